@@ -0,0 +1,139 @@
+"""In-memory view of the Apps/*.json catalog.
+
+Every record is parsed once when the catalog is loaded. The scripts read and
+update records through the catalog, and save() writes back only the records
+that were changed, and only if their JSON text actually differs from the file.
+"""
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter, defaultdict
+from pathlib import Path
+
+
+def write_json_if_changed(file_path, content, original=None):
+    """Atomically replace file_path with content unless it already holds exactly that.
+
+    original is the text the file had when it was read, if known, which saves
+    reading it again. Returns "new", "changed" or "unchanged".
+    """
+    if original is None and os.path.exists(file_path):
+        with open(file_path, "r") as f:
+            original = f.read()
+    if original == content:
+        return "unchanged"
+    status = "new" if original is None else "changed"
+
+    directory = os.path.dirname(file_path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.splitext(file_path)[1])
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        if status == "changed":
+            shutil.copymode(file_path, temp_path)
+        else:
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, file_path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return status
+
+
+class AppCatalog:
+    """App records keyed by their sanitized name (the JSON file name without .json).
+
+    Secondary indexes map bundle IDs and app types to names.
+    """
+
+    def __init__(self, apps_folder="Apps"):
+        self.apps_folder = Path(apps_folder)
+        self._records = {}
+        self._texts = {}
+        self._dirty = set()
+        self._by_bundle_id = defaultdict(set)
+        self._by_type = defaultdict(set)
+
+    @classmethod
+    def load(cls, apps_folder="Apps"):
+        catalog = cls(apps_folder)
+        for app_json in sorted(catalog.apps_folder.glob("*.json")):
+            catalog.reload(app_json.stem)
+        return catalog
+
+    def reload(self, name):
+        """(Re)read one record from disk, e.g. after an external script wrote it."""
+        path = self.path(name)
+        try:
+            with open(path, "r") as f:
+                text = f.read()
+            record = json.loads(text)
+        except Exception as e:
+            print(f"Error reading {path}: {e}")
+            return None
+        self._unindex(name)
+        self._records[name] = record
+        self._texts[name] = text
+        self._dirty.discard(name)
+        self._index(name)
+        return record
+
+    def path(self, name):
+        return self.apps_folder / f"{name}.json"
+
+    def __contains__(self, name):
+        return name in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(sorted(self._records))
+
+    def get(self, name):
+        return self._records.get(name)
+
+    def items(self):
+        return [(name, self._records[name]) for name in self]
+
+    def put(self, name, record):
+        """Store a new or updated record; it is written by the next save()."""
+        self._unindex(name)
+        self._records[name] = record
+        self._dirty.add(name)
+        self._index(name)
+
+    def by_bundle_id(self, bundle_id):
+        return sorted(self._by_bundle_id.get(bundle_id, ()))
+
+    def by_type(self, app_type):
+        return sorted(self._by_type.get(app_type, ()))
+
+    def save(self):
+        """Write every updated record whose JSON differs from the file on disk.
+
+        Returns a Counter of "new", "changed" and "unchanged" records.
+        """
+        counts = Counter()
+        self.apps_folder.mkdir(parents=True, exist_ok=True)
+        for name in sorted(self._dirty):
+            content = json.dumps(self._records[name], indent=2)
+            status = write_json_if_changed(str(self.path(name)), content, self._texts.get(name))
+            self._texts[name] = content
+            counts[status] += 1
+        self._dirty.clear()
+        return counts
+
+    def _index(self, name):
+        record = self._records[name]
+        if record.get("bundleId"):
+            self._by_bundle_id[record["bundleId"]].add(name)
+        self._by_type[record.get("type")].add(name)
+
+    def _unindex(self, name):
+        record = self._records.get(name)
+        if record is None:
+            return
+        self._by_bundle_id.get(record.get("bundleId"), set()).discard(name)
+        self._by_type.get(record.get("type"), set()).discard(name)
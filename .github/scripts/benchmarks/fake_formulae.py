@@ -0,0 +1,200 @@
+"""Local stand-in for formulae.brew.sh used by the benchmarks.
+
+Serves cask records at /api/cask/<token>.json, the bulk index at
+/api/cask.json and synthetic installers at /dl/<token>/<file>. Cask records
+are generated from the token, or taken from a saved cask.json snapshot, with
+their download URLs pointing back at this server. Every response can be slowed
+down by a fixed latency and a per-connection bandwidth limit, and all requests
+and bytes are counted so runs can be compared.
+"""
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from json_stream import iter_array_items
+
+CHUNK_SIZE = 64 * 1024
+# Installers are served as this block repeated, so any size costs no memory
+PAYLOAD_BLOCK = hashlib.sha256(b"intunebrew-benchmark").digest() * (CHUNK_SIZE // 32)
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def payload_size(token, median_bytes):
+    """Deterministic, log-normally distributed installer size for a token."""
+    rng = random.Random(zlib.crc32(token.encode("utf-8")))
+    size = int(median_bytes * math.exp(rng.gauss(0, 0.8)))
+    return max(64 * 1024, min(size, median_bytes * 8))
+
+
+def synthetic_cask(token, version):
+    """A cask record with the fields collect_app_info and the uninstall generator use."""
+    name = token.replace("-", " ").title()
+    bundle_id = f"com.example.{token.replace('-', '')}"
+    return {
+        "token": token,
+        "old_tokens": [],
+        "name": [name],
+        "desc": f"{name} benchmark fixture",
+        "homepage": f"https://example.com/{token}",
+        "url": f"{token}-{version}.dmg",
+        "version": version,
+        "artifacts": [
+            {"app": [f"{name}.app"]},
+            {"uninstall": [{"quit": bundle_id, "pkgutil": bundle_id}]},
+            {"zap": [{"trash": [f"~/Library/Application Support/{name}",
+                                f"~/Library/Preferences/{bundle_id}.plist"]}]},
+        ],
+    }
+
+
+class FakeFormulae:
+    """Fixture data and counters shared by all request handlers."""
+
+    def __init__(self, version="1.0.0", median_payload_bytes=4 * 1024 * 1024,
+                 latency=0.0, bandwidth=0, snapshot=None):
+        self.version = version
+        self.median_payload_bytes = median_payload_bytes
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.snapshot = {}
+        if snapshot:
+            with open(snapshot, "r", encoding="utf-8") as f:
+                for cask in iter_array_items(f):
+                    self.snapshot[cask["token"]] = cask
+        self.base_url = None
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = Counter()
+            self.bytes_sent = 0
+            self.not_modified = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "requests_by_kind": dict(sorted(self.requests.items())),
+                "not_modified": self.not_modified,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    def count(self, kind, sent=0, not_modified=False):
+        with self._lock:
+            self.requests[kind] += 1
+            self.bytes_sent += sent
+            if not_modified:
+                self.not_modified += 1
+
+    def cask(self, token):
+        cask = dict(self.snapshot.get(token) or synthetic_cask(token, self.version))
+        file_name = (urlparse(cask["url"]).path.rsplit("/", 1)[-1] or f"{token}.dmg")
+        cask["url"] = f"{self.base_url}/dl/{token}/{file_name}"
+        return cask
+
+    def tokens(self):
+        return sorted(self.snapshot)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def do_HEAD(self):
+        self._dispatch(head=True)
+
+    def do_GET(self):
+        self._dispatch(head=False)
+
+    def _dispatch(self, head):
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        path = urlparse(self.path).path
+        if path == "/api/cask.json":
+            tokens = self.server.index_tokens or self.fake.tokens()
+            body = json.dumps([self.fake.cask(token) for token in tokens]).encode("utf-8")
+            self._send_json("index", body, head)
+        elif path.startswith("/api/cask/") and path.endswith(".json"):
+            token = path[len("/api/cask/"):-len(".json")]
+            body = json.dumps(self.fake.cask(token)).encode("utf-8")
+            self._send_json("metadata", body, head)
+        elif path.startswith("/dl/"):
+            token = path.split("/")[2]
+            self._send_payload(token, head)
+        else:
+            self.fake.count("not_found")
+            self.send_error(404)
+
+    def _send_json(self, kind, body, head):
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self.fake.count(kind, not_modified=True)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if head:
+            self.fake.count(kind + "_head")
+            return
+        self._write(body)
+        self.fake.count(kind, sent=len(body))
+
+    def _send_payload(self, token, head):
+        size = payload_size(token, self.fake.median_payload_bytes)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("ETag", f'"{token}-{size}"')
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        if head:
+            self.fake.count("download_head")
+            return
+        remaining = size
+        while remaining > 0:
+            chunk = PAYLOAD_BLOCK[:min(remaining, CHUNK_SIZE)]
+            self._write(chunk)
+            remaining -= len(chunk)
+        self.fake.count("download", sent=size)
+
+    def _write(self, data):
+        for start in range(0, len(data), CHUNK_SIZE):
+            chunk = data[start:start + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            if self.fake.bandwidth:
+                time.sleep(len(chunk) / self.fake.bandwidth)
+
+
+def start_server(fake, index_tokens=None, port=0):
+    """Serve fake on 127.0.0.1 in a background thread; returns the server."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.fake = fake
+    # Tokens listed in /api/cask.json when no snapshot is loaded
+    server.index_tokens = sorted(index_tokens) if index_tokens else None
+    fake.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,222 @@
+"""Offline end-to-end benchmark of collect_app_info.py.
+
+Starts the fake_formulae stand-in, then runs collect_app_info.main() for each
+variant in a fresh copy of the repository (Apps, Logos, README and scripts),
+with every Homebrew URL pointed at the stand-in and the custom scrapers
+disabled. For each variant it reports wall time, requests issued, bytes
+transferred and files written, and appends the results to a JSON file so runs
+can be compared over time.
+
+    python .github/scripts/benchmarks/run_benchmark.py --latency 50 --bandwidth 20
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = SCRIPTS_DIR.parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from cask_index import token_from_url
+from fake_formulae import FakeFormulae, start_server
+
+# Runs inside the copied tree: point every URL at the stand-in and call main()
+CHILD_SCRIPT = """
+import json, sys
+sys.path.insert(0, ".github/scripts")
+import collect_app_info
+base_url, limit, argv = sys.argv[1], int(sys.argv[2]), json.loads(sys.argv[3])
+for policy in collect_app_info.app_list_policies:
+    urls = [url.replace("https://formulae.brew.sh", base_url) for url in policy["urls"]]
+    policy["urls"][:] = urls[:limit] if limit else urls
+collect_app_info.custom_scrapers[:] = []
+collect_app_info.main(argv)
+"""
+
+VARIANTS = {
+    "sequential": {"args": []},
+    "concurrent": {"args": ["--workers", "8", "--hash-workers", "4"]},
+    # Same as concurrent, measured after a warm-up run has filled the caches
+    "cached": {"args": ["--workers", "8", "--hash-workers", "4", "--cache-dir", "{cache_dir}"], "warm_up": True},
+    "index": {"args": ["--workers", "8", "--hash-workers", "4", "--cask-index", "{base_url}/api/cask.json"]},
+}
+
+
+def catalog_tokens(limit):
+    """Cask tokens of every URL collect_app_info would request."""
+    import collect_app_info
+    tokens = set()
+    for policy in collect_app_info.app_list_policies:
+        urls = policy["urls"][:limit] if limit else policy["urls"]
+        tokens.update(token_from_url(url) for url in urls)
+    return tokens - {None}
+
+
+def make_tree(root):
+    """Copy the parts of the repository collect_app_info reads and writes."""
+    shutil.copytree(SCRIPTS_DIR, root / ".github" / "scripts",
+                    ignore=shutil.ignore_patterns("__pycache__", "benchmarks"))
+    shutil.copytree(REPO_ROOT / "Apps", root / "Apps")
+    shutil.copytree(REPO_ROOT / "Logos", root / "Logos")
+    shutil.copy2(REPO_ROOT / "README.md", root / "README.md")
+
+
+def snapshot_files(root):
+    """(inode, mtime) of every output file, to tell which ones were written."""
+    files = {}
+    for path in list((root / "Apps").glob("*.json")) + [root / "README.md"]:
+        stat = path.stat()
+        files[path.relative_to(root).as_posix()] = (stat.st_ino, stat.st_mtime_ns)
+    return files
+
+
+def run_collect(tree, base_url, limit, argv, log_path):
+    env = dict(os.environ, NO_PROXY="127.0.0.1,localhost", no_proxy="127.0.0.1,localhost")
+    with open(log_path, "w") as log:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT, base_url, str(limit), json.dumps(argv)],
+            cwd=tree, env=env, stdout=log, stderr=subprocess.STDOUT)
+        elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        with open(log_path, "r") as log:
+            tail = log.readlines()[-20:]
+        raise RuntimeError(f"collect_app_info.py exited with {result.returncode}:\n{''.join(tail)}")
+    return elapsed
+
+
+def run_variant(name, fake, limit, work_dir):
+    variant = VARIANTS[name]
+    tree = work_dir / name
+    make_tree(tree)
+    cache_dir = work_dir / f"{name}-cache"
+    argv = [arg.format(cache_dir=cache_dir, base_url=fake.base_url) for arg in variant["args"]]
+
+    if variant.get("warm_up"):
+        print(f"   warming up {name}...")
+        run_collect(tree, fake.base_url, limit, argv, work_dir / f"{name}-warm-up.log")
+        shutil.rmtree(tree)
+        make_tree(tree)
+
+    before = snapshot_files(tree)
+    fake.reset_stats()
+    elapsed = run_collect(tree, fake.base_url, limit, argv, work_dir / f"{name}.log")
+    after = snapshot_files(tree)
+
+    written = sorted(path for path, state in after.items() if before.get(path) != state)
+    result = {
+        "variant": name,
+        "args": argv,
+        "wall_seconds": round(elapsed, 3),
+        "files_written": len(written),
+        "apps_written": sum(1 for path in written if path.startswith("Apps/")),
+        "readme_written": "README.md" in written,
+    }
+    result.update(fake.stats())
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_results(path, run):
+    runs = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            runs = json.load(f)
+    runs.append(run)
+    with open(path, "w") as f:
+        json.dump(runs, f, indent=2)
+
+
+def print_table(results):
+    print(f"\n{'Variant':<12} {'Wall (s)':>9} {'Requests':>9} {'304s':>6} {'MB sent':>9} {'Files written':>14}")
+    for result in results:
+        print(f"{result['variant']:<12} {result['wall_seconds']:>9.2f} {result['requests']:>9} "
+              f"{result['not_modified']:>6} {result['bytes_sent'] / 1024 / 1024:>9.1f} {result['files_written']:>14}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark collect_app_info.py against a local fake formulae.brew.sh')
+    parser.add_argument('--variants', default=','.join(VARIANTS),
+                        help=f'Comma-separated variants to run (default: {",".join(VARIANTS)})')
+    parser.add_argument('--limit', type=int, default=0,
+                        help='Only use the first N URLs of each app list (default: all)')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Added latency per request in milliseconds (default: 0)')
+    parser.add_argument('--bandwidth', type=float, default=0,
+                        help='Bandwidth per connection in MB/s (default: unlimited)')
+    parser.add_argument('--payload-mb', type=float, default=4,
+                        help='Median size of the synthetic installers in MB (default: 4)')
+    parser.add_argument('--version', default='1.0.0',
+                        help='Version reported for every synthetic cask (default: 1.0.0)')
+    parser.add_argument('--snapshot',
+                        help='Serve cask records from a saved cask.json instead of synthetic ones')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='JSON file the results are appended to (default: benchmark_results.json)')
+    parser.add_argument('--keep', action='store_true',
+                        help='Keep the temporary trees and logs for inspection')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.variants.split(',') if name.strip()]
+    unknown = [name for name in names if name not in VARIANTS]
+    if unknown:
+        sys.exit(f"Unknown variants: {', '.join(unknown)}")
+
+    fake = FakeFormulae(version=args.version,
+                        median_payload_bytes=int(args.payload_mb * 1024 * 1024),
+                        latency=args.latency / 1000,
+                        bandwidth=int(args.bandwidth * 1024 * 1024),
+                        snapshot=args.snapshot)
+    server = start_server(fake, index_tokens=catalog_tokens(args.limit))
+    print(f"🧪 Fake formulae.brew.sh listening on {fake.base_url}")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="intunebrew-bench-"))
+    results = []
+    try:
+        for name in names:
+            print(f"⏱️ Running {name}...")
+            results.append(run_variant(name, fake, args.limit, work_dir))
+    finally:
+        server.shutdown()
+        if args.keep:
+            print(f"📁 Trees and logs kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_table(results)
+    append_results(args.output, {
+        "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "limit": args.limit,
+            "latency_ms": args.latency,
+            "bandwidth_mb_s": args.bandwidth,
+            "payload_mb": args.payload_mb,
+            "version": args.version,
+            "snapshot": args.snapshot,
+        },
+        "results": results,
+    })
+    print(f"\n📝 Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""In-memory index of the full Homebrew cask catalog.
+
+The formulae.brew.sh API publishes every cask in a single cask.json document.
+Loading it once and serving lookups from memory replaces one HTTP request per
+cask. The index can be loaded from the API or from a saved snapshot on disk,
+which also allows running offline.
+"""
+import gzip
+import io
+import os
+import re
+from urllib.parse import urlparse
+
+import requests
+
+from json_stream import iter_array_items
+
+CASK_INDEX_URL = "https://formulae.brew.sh/api/cask.json"
+
+
+def token_from_url(json_url):
+    """Return the cask token of a formulae.brew.sh cask API URL, or None."""
+    path = urlparse(json_url).path
+    if "/api/cask/" not in path or not path.endswith(".json"):
+        return None
+    return os.path.basename(path)[:-len(".json")]
+
+
+def normalize_name(name):
+    """Lowercase name without spaces, hyphens, underscores and dots, so
+    "Visual Studio Code" and "visual-studio-code" compare equal."""
+    return re.sub(r"[\s\-_.]+", "", name.lower())
+
+
+class CaskIndex:
+    """Token -> cask record map built from the bulk cask.json document.
+
+    names maps normalized tokens, old tokens and display names to the current
+    token, so an app known only by its name resolves in one lookup. Display
+    names shared by several casks resolve to the first of them and are listed
+    in ambiguous.
+    """
+
+    def __init__(self, records=None, names=None, ambiguous=None):
+        self.records = records if records is not None else {}
+        self.names = names if names is not None else {}
+        self.ambiguous = ambiguous if ambiguous is not None else set()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, token):
+        return token in self.records
+
+    def get(self, token):
+        return self.records.get(token)
+
+    def resolve_token(self, name):
+        """Token of the cask whose token, old token or display name matches name, or None."""
+        return self.names.get(normalize_name(name))
+
+    def is_ambiguous(self, name):
+        """Whether name is only the display name of several casks, so resolving it is a guess."""
+        return normalize_name(name) in self.ambiguous
+
+    @classmethod
+    def load(cls, source=CASK_INDEX_URL, tokens=None, session=None):
+        """Stream cask.json from a URL or local path (optionally gzipped).
+
+        When tokens is given only those casks are kept, which keeps memory use
+        proportional to the catalog instead of the whole of Homebrew. Renamed
+        casks are also reachable through their old tokens.
+        """
+        wanted = set(tokens) if tokens is not None else None
+        records = {}
+        token_names = {}
+        display_names = {}
+        ambiguous = set()
+        with _open_source(source, session) as fp:
+            for cask in iter_array_items(fp):
+                token = cask.get("token")
+                names = [token] + list(cask.get("old_tokens") or [])
+                kept = False
+                for name in names:
+                    if name and (wanted is None or name in wanted):
+                        records.setdefault(name, cask)
+                        kept = True
+                if not kept or not token:
+                    continue
+                for name in names:
+                    if name:
+                        token_names.setdefault(normalize_name(name), token)
+                for name in cask.get("name") or []:
+                    name = normalize_name(name)
+                    if display_names.setdefault(name, token) != token:
+                        ambiguous.add(name)
+        # A token always wins over another cask's display name
+        display_names.update(token_names)
+        ambiguous.difference_update(token_names)
+        print(f"📚 Loaded {len(records)} casks from cask index {source}")
+        return cls(records, display_names, ambiguous)
+
+
+def _open_source(source, session=None):
+    if os.path.exists(source):
+        if source.endswith(".gz"):
+            return gzip.open(source, "rt", encoding="utf-8")
+        return open(source, "r", encoding="utf-8")
+
+    response = (session or requests).get(source, stream=True, timeout=60)
+    response.raise_for_status()
+    response.raw.decode_content = True
+    # Keep the raw stream open at EOF so TextIOWrapper can finish reading it
+    response.raw.auto_close = False
+    return io.TextIOWrapper(response.raw, encoding="utf-8")
@@ -0,0 +1,633 @@
+import os
+import sys
+import json
+import time
+import argparse
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+from supabase import create_client, Client
+from app_catalog import AppCatalog
+from cpe_dictionary import CpeDictionary, CpeMappings
+from cve_cache import CveCache, split_cpe, summarize_cve
+from http_transport import HttpTransport, TokenBucket
+from nvd_feed import CveFeedIndex
+
+parser = argparse.ArgumentParser(description='Check the supported apps for CVEs published in NVD')
+parser.add_argument('--incremental', action='store_true', default=os.environ.get('INTUNEBREW_CVE_INCREMENTAL') == '1',
+                    help='Only ask NVD for CVEs modified since the last sync recorded in the CVE cache')
+parser.add_argument('--cache-file', default=os.environ.get('INTUNEBREW_CVE_CACHE', '.cache/nvd/cve_cache.json'),
+                    help='CVE cache used and updated by every run (default: .cache/nvd/cve_cache.json)')
+parser.add_argument('--cpe-dictionary', default=os.environ.get('INTUNEBREW_CPE_DICTIONARY'),
+                    help='Find CPE names in this NVD CPE dictionary snapshot (JSON file, chunk directory or nvdcpe-2.0.tar.gz) instead of searching NVD')
+parser.add_argument('--cpe-mappings', default='cpe_mappings.json',
+                    help='File of the CPE names resolved per app, reused by later runs (default: cpe_mappings.json)')
+parser.add_argument('--refresh-cpe-mappings', action='store_true',
+                    help='Resolve the CPE names of every app again instead of reusing stored ones')
+parser.add_argument('--nvd-feed', nargs='+', default=os.environ.get('INTUNEBREW_NVD_FEEDS', '').split() or None,
+                    help='Match CVEs against these NVD CVE feed files or directories (nvdcve-2.0-*.json[.gz|.zip]) instead of querying NVD per CPE')
+args = parser.parse_args()
+
+# Get NVD API key from environment - required unless CVEs come from local feeds
+nvd_api_key = os.environ.get('NVD_API_KEY')
+
+# Check if API key is available
+if not nvd_api_key and not args.nvd_feed:
+    print("ERROR: NVD_API_KEY is required but not found in environment variables.")
+    print("Please add your NVD API key as a repository secret named NVD_API_KEY.")
+    print("Get an API key at: https://nvd.nist.gov/developers/request-an-api-key")
+    sys.exit(1)
+    
+# Initialize Supabase client
+supabase_url = os.environ.get('SUPABASE_URL')
+supabase_key = os.environ.get('SUPABASE_KEY')
+
+if not supabase_url or not supabase_key:
+    print("ERROR: Supabase credentials are required but not found in environment variables.")
+    print("Please add your Supabase URL and service role key as repository secrets.")
+    sys.exit(1)
+    
+supabase: Client = create_client(supabase_url, supabase_key)
+    
+# With API key, rate limits are 50 requests per 30 seconds
+NVD_CVE_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
+NVD_PAGE_SIZE = 2000
+NVD_REQUESTS = 50
+NVD_PERIOD = 30
+NVD_BURST = 5
+
+# Apps whose NVD queries are in flight at the same time
+cve_workers = int(os.environ.get('INTUNEBREW_CVE_WORKERS', '8'))
+
+# Shared HTTP transport: pooled connections and retries with backoff. Every
+# request takes a token from a bucket that stays within the NVD budget; NVD
+# answers 403 or 503 when a client goes too fast, which pauses all requests
+# and slows the bucket down.
+transport = HttpTransport(
+    per_host_limit=cve_workers,
+    backoff=6,
+    rate_limiter=TokenBucket.for_budget(NVD_REQUESTS, NVD_PERIOD, NVD_BURST),
+    throttle_statuses={403, 429, 503},
+)
+
+# App files missing locally come from GitHub, which must neither use up NVD
+# tokens nor slow NVD requests down when it throttles
+github_transport = HttpTransport()
+
+import json
+
+# Function to get proper app name from app JSON file
+def get_app_display_name(app_key, app_url):
+    try:
+        response = github_transport.get(app_url)
+        if response.status_code == 200:
+            app_data = response.json()
+            # Get the display name from the JSON file
+            display_name = app_data.get('name') or app_data.get('display_name')
+            if display_name:
+                return display_name
+        # If we can't get the display name, format the key as a fallback
+        return ' '.join(word.capitalize() for word in app_key.split('_'))
+    except Exception as e:
+        print(f"Error fetching app info for {app_key}: {str(e)}")
+        # Format the key as a fallback
+        return ' '.join(word.capitalize() for word in app_key.split('_'))
+
+# Create CVE directory if it doesn't exist
+cve_dir = pathlib.Path('CVE')
+cve_dir.mkdir(exist_ok=True)
+
+# Read the supported apps from the JSON file
+try:
+    with open('supported_apps.json', 'r') as f:
+        supported_apps = json.load(f)
+    
+    print(f"Found {len(supported_apps)} apps in supported_apps.json")
+    
+    # The app files are in the checkout, so read them all in one pass
+    # instead of fetching each one from GitHub
+    catalog = AppCatalog.load('Apps')
+    print(f"Loaded {len(catalog)} app files from the Apps directory")
+    
+    # Process all apps
+    app_display_names = []
+    app_keys = []
+    fetched_count = 0
+    
+    for app_key, app_url in supported_apps.items():
+        app_data = catalog.get(app_key) or {}
+        display_name = app_data.get('name') or app_data.get('display_name')
+        if not display_name:
+            # Not available locally, so fall back to fetching the app file
+            display_name = get_app_display_name(app_key, app_url)
+            fetched_count += 1
+        app_display_names.append(display_name)
+        app_keys.append(app_key)
+    
+    if fetched_count:
+        print(f"Fetched {fetched_count} app files missing from the Apps directory")
+    print(f"Processing {len(app_display_names)} apps for CVE checks")
+    
+except Exception as e:
+    print(f"Error reading supported_apps.json: {str(e)}")
+    sys.exit(1)
+
+# List of apps to check
+apps_to_check = app_display_names
+
+# Function to get CPE names for an app
+def get_cpe_names(app_name):
+    print(f"\n{'=' * 50}")
+    print(f"Finding CPE names for {app_name}")
+    print(f"{'=' * 50}")
+    
+    # Normalize app name for search and ensure exact match
+    search_term = app_name.strip()
+    
+    try:
+        # Query the NVD API for CPE names
+        # Construct the URL directly to ensure exact format
+        search_term_encoded = quote(search_term)
+        url = f"https://services.nvd.nist.gov/rest/json/cpes/2.0?keywordSearch={search_term_encoded}"
+        params = {}  # No params as they're included in the URL
+        
+        # Set up headers with API key
+        headers = {'apiKey': nvd_api_key}
+        
+        # Make the request with API key in headers
+        print(f"Querying CPE API for: {search_term}")
+        print(f"URL: {url}")
+        response = transport.get(url, headers=headers)
+        
+        # Check if request was successful
+        if response.status_code != 200:
+            print(f"Error: CPE API request failed with status code {response.status_code}")
+            print(f"Response: {response.text}")
+            return None
+        
+        # Parse the JSON response
+        data = response.json()
+        
+        # Print the structure of the response for debugging
+        print(f"Response structure: {list(data.keys())}")
+        print(f"Total results: {data.get('totalResults', 0)}")
+        
+        # Extract CPEs from the products array
+        products = data.get('products', [])
+        
+        if not products:
+            print(f"No CPE names found for {app_name}.")
+            return []
+        
+        print(f"Found {len(products)} CPE entries in the products array.")
+        
+        # Debug: Print the type of products
+        print(f"Products type: {type(products)}")
+        
+        # If products is a list, print the type of the first few items
+        if isinstance(products, list) and products:
+            print(f"First product type: {type(products[0])}")
+            if len(products) > 1:
+                print(f"Second product type: {type(products[1])}")
+        
+        # Debug: Print the first product to see its structure
+        if products:
+            print(f"First product structure: {list(products[0].keys()) if isinstance(products[0], dict) else 'Not a dict'}")
+        
+        # Process the products based on their structure
+        # Filter products to ensure exact match for app_name in the CPE name
+        filtered_products = []
+        for product in products:
+            cpe_obj = product.get('cpe', {})
+            cpe_name = cpe_obj.get('cpeName', '')
+            
+            # Example cpeName: cpe:2.3:a:slackware:slackware:9.0:*:*:*:*:*:*:*
+            # We want to match the 'product' part, which is the 5th component (index 4)
+            # after splitting by ':'
+            
+            # Ensure it's an application CPE and has enough components
+            if cpe_name.startswith('cpe:2.3:a:') and len(cpe_name.split(':')) > 4:
+                product_name_in_cpe = cpe_name.split(':')[4]
+                
+                # Perform a case-insensitive exact match on the product name
+                if product_name_in_cpe.lower() == app_name.lower():
+                    filtered_products.append(product)
+                    
+        if not filtered_products:
+            print(f"No valid CPE entries found for {app_name} after filtering.")
+            return []
+        
+        print(f"Processed {len(filtered_products)} valid CPE entries after filtering.")
+        
+        # Sort by published date (descending) to get the most recent ones
+        def extract_date_for_sorting(product):
+            # Get the created date (which is the published date) from the cpe object
+            cpe_obj = product.get('cpe', {})
+            published_date = cpe_obj.get('created', '')
+            # Parse the date string into a datetime object for sorting
+            try:
+                if published_date:
+                    return datetime.strptime(published_date.split('.')[0], "%Y-%m-%dT%H:%M:%S")
+                return datetime.min
+            except Exception as e:
+                print(f"Error parsing date {published_date}: {str(e)}")
+                return datetime.min
+        
+        # Sort by published date in descending order (newest first)
+        sorted_cpes = sorted(filtered_products, key=extract_date_for_sorting, reverse=True)
+        
+        # Take the 5 most recent CPEs
+        recent_cpes = sorted_cpes[:5]
+        
+        # Print the selected CPEs for debugging
+        print("Selected CPEs by published date:")
+        for product in recent_cpes:
+            cpe_obj = product.get('cpe', {})
+            cpe_name = cpe_obj.get('cpeName', 'N/A')
+            published_date = cpe_obj.get('created', 'N/A')
+            print(f"  Name: {cpe_name}, Published: {published_date}")
+        
+        # Extract just the CPE names
+        cpe_names = [product.get('cpe', {}).get('cpeName') for product in recent_cpes
+                    if product.get('cpe', {}).get('cpeName')]
+        
+        print(f"Using the {len(cpe_names)} most recent CPE names:")
+        for cpe_name in cpe_names:
+            print(f"  - {cpe_name}")
+        
+        return cpe_names
+        
+    except Exception as e:
+        print(f"Error finding CPE names for {app_name}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+# Function to check CVEs for a specific CPE name
+def check_cves_for_cpe(cpe_name, app_name):
+    print(f"\n{'-' * 50}")
+    print(f"Checking CVEs for CPE: {cpe_name}")
+    print(f"{'-' * 50}")
+    
+    # Get CVEs from the last 90 days
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=90)
+    
+    # Format dates for NVD API (ISO format)
+    start_date_str = start_date.strftime("%Y-%m-%dT00:00:00.000")
+    end_date_str = end_date.strftime("%Y-%m-%dT23:59:59.999")
+    
+    try:
+        # Query the NVD API for CVEs using the CPE name
+        # Construct the URL directly to ensure exact format
+        # cpe_name_encoded = quote(cpe_name)
+        start_date_encoded = quote(start_date_str)
+        url = f"https://services.nvd.nist.gov/rest/json/cves/2.0?cpeName={cpe_name}"
+        
+        # Set up headers with API key
+        headers = {'apiKey': nvd_api_key}
+        
+        # Make the request with API key in headers
+        response = transport.get(url, headers=headers)
+        
+        # Check if request was successful
+        if response.status_code != 200:
+            print(f"Error: CVE API request failed with status code {response.status_code}")
+            print(f"Response: {response.text}")
+            return None
+        
+        # Parse the JSON response
+        data = response.json()
+        
+        # Get the total count and vulnerabilities
+        total_results = data.get('totalResults', 0)
+        vulnerabilities = data.get('vulnerabilities', [])
+        
+        if total_results == 0 or not vulnerabilities:
+            print(f"No CVEs found for this CPE in the last 90 days.")
+            return []
+        
+        print(f"Found {total_results} CVEs for this CPE in the last 90 days.")
+        
+        return [summarize_cve(vuln.get('cve', {})) for vuln in vulnerabilities]
+        
+    except Exception as e:
+        print(f"Error checking CVEs for CPE {cpe_name}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+# Function to turn a cached CVE summary into the record stored for an app
+def vuln_from_summary(summary, cpe_name):
+    published_date = "N/A"
+    last_modified_date = "N/A"
+    published_datetime = None
+    last_modified_datetime = None
+    if summary['published']:
+        published_date = summary['published'].split('T')[0]
+        published_datetime = datetime.strptime(summary['published'].split('.')[0], "%Y-%m-%dT%H:%M:%S")
+    if summary['last_modified']:
+        last_modified_date = summary['last_modified'].split('T')[0]
+        last_modified_datetime = datetime.strptime(summary['last_modified'].split('.')[0], "%Y-%m-%dT%H:%M:%S")
+    
+    return {
+        'cve_id': summary['cve_id'],
+        'published_date': published_date,
+        'published_datetime': published_datetime,
+        'last_modified_date': last_modified_date,
+        'last_modified_datetime': last_modified_datetime,
+        'base_score': summary['base_score'],
+        'severity': summary['severity'],
+        'description': summary['description'],
+        'cpe_name': cpe_name
+    }
+
+# Function to fetch every CVE modified in a lastModified window, a page at a time
+def fetch_modified_cves(start_date, end_date):
+    headers = {'apiKey': nvd_api_key}
+    cves = []
+    start_index = 0
+    while True:
+        url = (f"{NVD_CVE_URL}?lastModStartDate={quote(start_date)}&lastModEndDate={quote(end_date)}"
+               f"&startIndex={start_index}&resultsPerPage={NVD_PAGE_SIZE}")
+        response = transport.get(url, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"CVE API request failed with status code {response.status_code}")
+        data = response.json()
+        vulnerabilities = data.get('vulnerabilities', [])
+        cves.extend(vuln.get('cve', {}) for vuln in vulnerabilities)
+        start_index += len(vulnerabilities)
+        print(f"Fetched {start_index} of {data.get('totalResults', 0)} modified CVEs")
+        if not vulnerabilities or start_index >= data.get('totalResults', 0):
+            return cves
+
+# Function to query NVD for the CVEs of a specific app; runs on worker threads
+# Returns (CPE names, {CPE name: [CVE summaries]}, complete), where complete is
+# False if any request failed, so the results are not cached. The CPE names are
+# only searched for when they are not given
+def find_app_vulns(app_name, cpe_names=None):
+    print(f"\n{'=' * 50}")
+    print(f"Checking CVEs for {app_name}")
+    print(f"{'=' * 50}")
+    
+    # Step 1: Get CPE names for the app
+    if cpe_names is None:
+        cpe_names = get_cpe_names(app_name)
+    
+    if cpe_names is None:
+        return None, {}, False
+    
+    # Step 2: Get CVEs for each CPE name; the transport keeps to the rate limit
+    cves_by_cpe = {}
+    complete = True
+    for cpe_name in cpe_names:
+        summaries = check_cves_for_cpe(cpe_name, app_name)
+        if summaries is None:
+            complete = False
+            continue
+        cves_by_cpe[cpe_name] = summaries
+    return cpe_names, cves_by_cpe, complete
+
+# Function to remove the stored CVEs of an app that no longer has any
+def clear_app_cves(app_name, app_key):
+    try:
+        supabase.table('app_cves').delete().eq('app_name', app_name).execute()
+    except Exception as e:
+        print(f"Error deleting existing CVEs for {app_name}: {str(e)}")
+    cve_file_path = cve_dir / f"{app_key}.json"
+    if cve_file_path.exists():
+        cve_file_path.unlink()
+        print(f"🗑️ Removed CVE file {cve_file_path}")
+
+# Function to store the CVEs found for a specific app; runs on the main thread.
+# complete=True means an empty result shows the CVEs stored earlier were
+# withdrawn, so they are removed; otherwise stored CVEs are left alone
+def check_cves_for_app(app_name, app_key, cves_by_cpe, *, complete):
+    if not cves_by_cpe:
+        print(f"No CPE names found for {app_name}, cannot check for CVEs.")
+        return
+    
+    all_vulns = [vuln_from_summary(summary, cpe_name)
+                 for cpe_name, summaries in cves_by_cpe.items() for summary in summaries]
+    
+    if not all_vulns:
+        print(f"No CVEs found for {app_name} in the last 90 days.")
+        if complete:
+            clear_app_cves(app_name, app_key)
+        return
+    
+    # Deduplicate CVEs by cve_id to avoid database constraint violations
+    # Create a dictionary to store the most recent version of each CVE
+    unique_cves = {}
+    for vuln in all_vulns:
+        cve_id = vuln['cve_id']
+        # If we haven't seen this CVE before, or this one is more recent, keep it
+        if (cve_id not in unique_cves or
+            (vuln['published_datetime'] is not None and
+             unique_cves[cve_id]['published_datetime'] is not None and
+             vuln['published_datetime'] > unique_cves[cve_id]['published_datetime'])):
+            unique_cves[cve_id] = vuln
+    
+    # Convert back to a list
+    deduplicated_vulns = list(unique_cves.values())
+    
+    # Sort by published date (newest first)
+    sorted_vulns = sorted(
+        [v for v in deduplicated_vulns if v['published_datetime'] is not None],
+        key=lambda x: x['published_datetime'],
+        reverse=True
+    )
+    
+    # Take only the 5 most recent CVEs
+    recent_vulns = sorted_vulns[:5]
+    
+    print(f"\nFound {len(all_vulns)} total CVEs for {app_name} in the last 90 days.")
+    print(f"Displaying the 5 most recent CVEs sorted by published date:")
+    print(f"\n{'ID':<20} {'Published':<12} {'Last Modified':<12} {'Base Score':<10} {'Severity':<10}")
+    print(f"{'-' * 72}")
+    
+    # First, delete existing CVEs for this app to avoid duplicates
+    try:
+        print(f"Removing existing CVE records for {app_name}...")
+        supabase.table('app_cves').delete().eq('app_name', app_name).execute()
+    except Exception as e:
+        print(f"Error deleting existing CVEs for {app_name}: {str(e)}")
+    
+    # Store the CVEs in the database
+    if recent_vulns:
+        print(f"Storing {len(recent_vulns)} CVEs for {app_name} in the database...")
+        cve_records = []
+        for vuln in recent_vulns:
+            # Convert base_score to float if it's not N/A
+            base_score_value = None
+            if vuln['base_score'] != 'N/A':
+                try:
+                    base_score_value = float(vuln['base_score'])
+                except:
+                    pass
+                
+            cve_record = {
+                'app_name': app_name,
+                'cve_id': vuln['cve_id'],
+                'published_date': vuln['published_date'] if vuln['published_date'] != 'N/A' else None,
+                'last_modified_date': vuln['last_modified_date'] if vuln['last_modified_date'] != 'N/A' else None,
+                'base_score': base_score_value,
+                'severity': vuln['severity'] if vuln['severity'] != 'N/A' else None,
+                'description': vuln['description'] if vuln['description'] != 'N/A' else None,
+                'cpe_name': vuln['cpe_name']
+            }
+            cve_records.append(cve_record)
+        
+        try:
+            result = supabase.table('app_cves').insert(cve_records).execute()
+            print(f"✅ Successfully stored CVEs for {app_name} in the database")
+        except Exception as e:
+            print(f"Error storing CVEs for {app_name}: {str(e)}")
+        
+        # Create JSON file in CVE folder with the same name as in Apps/
+        try:
+            # Create a JSON structure for the CVE data
+            cve_json = {
+                "app_name": app_name,
+                "last_updated": datetime.now().strftime("%Y-%m-%d"),
+                "vulnerabilities": []
+            }
+            
+            for vuln in recent_vulns:
+                cve_json["vulnerabilities"].append({
+                    "cve_id": vuln['cve_id'],
+                    "published_date": vuln['published_date'],
+                    "last_modified_date": vuln['last_modified_date'],
+                    "base_score": vuln['base_score'],
+                    "severity": vuln['severity'],
+                    "description": vuln['description'],
+                    "cpe_name": vuln['cpe_name']
+                })
+            
+            # Write to file with the same name as in Apps/
+            cve_file_path = cve_dir / f"{app_key}.json"
+            with open(cve_file_path, 'w') as f:
+                json.dump(cve_json, f, indent=2)
+            print(f"✅ Successfully created CVE file at {cve_file_path}")
+        except Exception as e:
+            print(f"Error creating CVE file for {app_name}: {str(e)}")
+    
+    # Display the results
+    for vuln in recent_vulns:
+        print(f"{vuln['cve_id']:<20} {vuln['published_date']:<12} {vuln['last_modified_date']:<12} {vuln['base_score']:<10} {vuln['severity']:<10}")
+        print(f"CPE: {vuln['cpe_name']}")
+        print(f"Description: {vuln['description']}")
+        print(f"{'-' * 72}")
+    
+    # Show how many were found vs. how many are displayed
+    if len(all_vulns) > 5:
+        print(f"Note: Showing 5 most recent CVEs out of {len(all_vulns)} found for {app_name}.")
+
+# Reuse the CPE names stored for each app, and look up the missing ones in the
+# CPE dictionary if one is given; the rest are searched for on NVD
+cpe_mappings = CpeMappings(args.cpe_mappings)
+cpe_dictionary = None
+if args.cpe_dictionary:
+    cpe_dictionary = CpeDictionary.load(args.cpe_dictionary, products={app.strip().lower() for app in app_display_names})
+known_cpe_names = {}
+for app, app_key in zip(app_display_names, app_keys):
+    app = app.strip()
+    cpe_names = None if args.refresh_cpe_mappings else cpe_mappings.get(app_key, app)
+    if cpe_names is None and cpe_dictionary is not None:
+        cpe_names = cpe_dictionary.lookup(app)
+        cpe_mappings.put(app_key, app, cpe_names, "dictionary")
+    # An empty mapping is not trusted: the CPE names are searched for again
+    known_cpe_names[app] = cpe_names or None
+print(f"CPE names known for {sum(1 for names in known_cpe_names.values() if names is not None)} apps, "
+      f"{'matching the others by product name' if args.nvd_feed else 'searching NVD for the others'}")
+
+# With local NVD feeds every app is matched in memory: apps with CPE names get
+# the CVEs whose configurations cover them, the others the CVEs of the product
+# with their name if only one vendor has such a product. Neither NVD nor the
+# CVE cache is involved. The feeds given may be any subset of the NVD feeds, so
+# an app missing from them keeps the CVEs stored for it.
+if args.nvd_feed:
+    products = {app.lower() for app in known_cpe_names}
+    for cpe_names in known_cpe_names.values():
+        products.update(split_cpe(cpe_name.lower())[4] for cpe_name in cpe_names or ())
+    feed_index = CveFeedIndex.load(args.nvd_feed, products=products)
+    print(f"\nChecking CVEs for {len(apps_to_check)} apps against the NVD feeds:")
+    for i, (app, app_key) in enumerate(zip(app_display_names, app_keys)):
+        app = app.strip()
+        if known_cpe_names[app] is not None:
+            cves_by_cpe = {cpe_name: feed_index.cves_for(cpe_name) for cpe_name in known_cpe_names[app]}
+        else:
+            cves_by_cpe = feed_index.cves_for_product(app)
+            if cves_by_cpe is None:
+                print(f"\n[{i+1}/{len(apps_to_check)}] Skipping {app}: several vendors have a product with this name and no CPE names are known")
+                continue
+        print(f"\n[{i+1}/{len(apps_to_check)}] Processing app: {app} (key: {app_key})")
+        check_cves_for_app(app, app_key, cves_by_cpe, complete=False)
+    cpe_mappings.save()
+    print("\nCVE check completed and data stored in Supabase database and CVE folder.")
+    sys.exit(0)
+
+# An incremental run merges the CVEs modified since the last sync into the
+# cache, and only queries NVD per app for apps the cache does not know yet
+sync_started = datetime.now(timezone.utc).replace(tzinfo=None)
+cve_cache = CveCache(args.cache_file)
+touched_apps = None
+if args.incremental:
+    window = cve_cache.sync_window(sync_started)
+    if window is None:
+        print("The CVE cache has no recent sync, checking every app in full")
+    else:
+        try:
+            print(f"Fetching CVEs modified between {window[0]} and {window[1]}")
+            touched_apps = cve_cache.merge_modified(fetch_modified_cves(*window))
+            print(f"Modified CVEs affect {len(touched_apps)} cached apps")
+        except Exception as e:
+            print(f"Error fetching modified CVEs, checking every app in full: {str(e)}")
+
+if touched_apps is None:
+    apps_to_query = [app.strip() for app in app_display_names]
+else:
+    apps_to_query = [app.strip() for app in app_display_names
+                     if not cve_cache.covers(app.strip(), known_cpe_names[app.strip()])]
+
+# Check CVEs for each app: NVD is queried for several apps at once, while the
+# database, the cache and the CVE folder are only written from here, one app at a time
+print(f"\nChecking CVEs for {len(apps_to_check)} apps, querying NVD for {len(apps_to_query)} with {cve_workers} workers:")
+start_time = time.monotonic()
+unchanged_count = 0
+with ThreadPoolExecutor(max_workers=cve_workers) as executor:
+    futures = {app: executor.submit(find_app_vulns, app, known_cpe_names[app]) for app in apps_to_query}
+    for i, (app, app_key) in enumerate(zip(app_display_names, app_keys)):
+        app = app.strip()
+        if app in futures:
+            try:
+                cpe_names, cves_by_cpe, complete = futures[app].result()
+            except Exception as e:
+                print(f"Error checking CVEs for {app}: {str(e)}")
+                continue
+            if cpe_names is not None and known_cpe_names[app] is None:
+                cpe_mappings.put(app_key, app, cpe_names, "nvd")
+            if complete:
+                cve_cache.store_app(app, cves_by_cpe)
+            else:
+                cve_cache.forget_app(app)
+            # An empty answer to a fresh query may be a bad match or a hiccup
+            withdrawn = False
+        elif app in touched_apps:
+            # The merge changed the cached CVEs, so none being left means they were withdrawn
+            cves_by_cpe = cve_cache.app_cves(app)
+            withdrawn = True
+        else:
+            unchanged_count += 1
+            continue
+        print(f"\n[{i+1}/{len(apps_to_check)}] Processing app: {app} (key: {app_key})")
+        check_cves_for_app(app, app_key, cves_by_cpe, complete=withdrawn)
+
+cve_cache.save(sync_started)
+cpe_mappings.save()
+if touched_apps is not None:
+    print(f"\n{unchanged_count} apps had no modified CVEs and were left as they are")
+print(f"\n{transport.summary()}")
+print(f"CVE check took {time.monotonic() - start_time:.0f}s")
+print("\nCVE check completed and data stored in Supabase database and CVE folder.")
@@ -1,13 +1,26 @@
 import json
 import os
-import requests
 import re
 import fileinput
 from pathlib import Path
 import subprocess
 from datetime import datetime
 import hashlib
+import argparse
+import copy
+import heapq
+import itertools
 import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from app_catalog import AppCatalog
+from cask_index import CASK_INDEX_URL, CaskIndex, token_from_url
+from http_transport import HttpTransport
+from profiling import PROFILE_DIR_ENV, Profiler
+from response_cache import ResponseCache
+from run_metrics import RunMetrics
 
 # List of apps that should preserve their fileName field (not be overwritten)
 preserve_filename_apps = [
@@ -561,41 +574,482 @@ custom_scrapers = [
     ".github/scripts/scrapers/remotehelp.sh",
 ]
 
-def calculate_file_hash(url):
-    """Download a file and calculate its SHA256 hash."""
-    print(f"📥 Downloading file from {url} to calculate hash...")
-    
-    # Create a temporary file
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+# How each URL list is processed, in order: the type flag passed to
+# get_homebrew_app_info, how an existing record is merged and when a new
+# SHA256 hash is needed
+app_list_policies = [
+    {
+        "label": "special app",
+        "urls": app_urls,
+        "flags": {"needs_packaging": True},
+        "merge": "repackaged",
+        "hash": "on_version_change",
+    },
+    {
+        "label": "Homebrew cask",
+        "urls": homebrew_cask_urls,
+        "flags": {},
+        "merge": "preserve",
+        "replaced_keys": ["version", "url", "sha", "previous_version"],
+        "hash": "when_missing",
+    },
+    {
+        "label": "PKG in PKG app",
+        "urls": pkg_in_pkg_urls,
+        "flags": {"is_pkg_in_pkg": True},
+        "merge": "preserve",
+        "replaced_keys": ["version", "url", "previous_version"],
+        "hash": None,
+    },
+    {
+        "label": "direct PKG app",
+        "urls": pkg_urls,
+        "flags": {"is_pkg": True},
+        "merge": "preserve",
+        "replaced_keys": ["version", "url", "previous_version"],
+        "hash": None,
+    },
+    {
+        "label": "PKG in DMG app",
+        "urls": pkg_in_dmg_urls,
+        "flags": {"is_pkg_in_dmg": True},
+        "merge": "preserve",
+        "replaced_keys": ["version", "url", "previous_version"],
+        "hash": None,
+    },
+]
+
+# Read size used when hashing installers
+HASH_BUFFER_SIZE = 1024 * 1024
+# Journals of runs started longer ago than this are not resumed
+DEFAULT_JOURNAL_MAX_AGE_HOURS = 24
+
+# Shared HTTP transport so every request reuses keep-alive connections and
+# gets retries, per-host limits and the circuit breaker
+http_transport = None
+
+# Bulk cask index, loaded in --cask-index mode
+cask_index = None
+
+# On-disk conditional-request cache, enabled with --cache-dir
+response_cache = None
+
+# Timings and counters for this run, written out with --metrics-file
+run_metrics = RunMetrics()
+
+# cProfile/tracemalloc hooks, enabled with --profile-dir
+profiler = Profiler()
+
+@contextmanager
+def run_phase(name):
+    """Time a phase of the run, and profile it when profiling is enabled."""
+    with run_metrics.phase(name), profiler.phase(name):
+        yield
+
+def get_transport(pool_size=10):
+    """Return the shared HTTP transport, creating it on first use."""
+    global http_transport
+    if http_transport is None:
+        http_transport = HttpTransport(pool_size=pool_size)
+        http_transport.hooks["response"].append(_record_response)
+    return http_transport
+
+def _record_response(response, *args, **kwargs):
+    # Streamed bodies are counted by whoever reads them
+    nbytes = 0
+    if not kwargs.get("stream") and response.request.method != "HEAD":
+        nbytes = int(response.headers.get("Content-Length") or 0)
+    run_metrics.record_request(response.url, response.elapsed.total_seconds(), nbytes)
+
+def fetch_app_infos(executor, urls, **kwargs):
+    """Yield (url, future) pairs for get_homebrew_app_info in input order.
+
+    With an executor all URLs are submitted up front so they are fetched
+    concurrently; without one each URL is fetched lazily when it is reached.
+    """
+    if executor is not None:
+        futures = [(url, executor.submit(profiler.wrap(_timed_app_info), url, **kwargs)) for url in urls]
+        return iter(futures)
+    return _fetch_app_infos_sequential(urls, **kwargs)
+
+def _timed_app_info(url, **kwargs):
+    start = time.perf_counter()
+    try:
+        return get_homebrew_app_info(url, **kwargs)
+    finally:
+        run_metrics.time_app(url, "metadata", time.perf_counter() - start)
+
+def _fetch_app_infos_sequential(urls, **kwargs):
+    for url in urls:
+        future = Future()
         try:
-            # Download the file in chunks
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            # Write the file in chunks
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    temp_file.write(chunk)
-            
-            temp_file.flush()
-            
-            # Calculate SHA256 hash
-            sha256_hash = hashlib.sha256()
-            with open(temp_file.name, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b''):
-                    sha256_hash.update(chunk)
-            
-            return sha256_hash.hexdigest()
-        
+            future.set_result(_timed_app_info(url, **kwargs))
         except Exception as e:
-            print(f"❌ Error calculating hash: {str(e)}")
+            future.set_exception(e)
+        yield url, future
+
+def calculate_file_hash(url, keep_path=None, throttle=None):
+    """Download a file and calculate its SHA256 hash while it streams in.
+
+    Nothing is written to disk unless keep_path is given, in which case the
+    downloaded file is also saved there. throttle, if given, is called with
+    the size of every chunk read.
+    """
+    print(f"📥 Downloading file from {url} to calculate hash...")
+
+    sha256_hash = hashlib.sha256()
+    # One reusable buffer keeps memory use flat regardless of the file size
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    artifact = None
+    downloaded = 0
+    try:
+        with get_transport().get(url, stream=True) as response:
+            start = time.perf_counter()
+            response.raise_for_status()
+            response.raw.decode_content = True
+
+            if keep_path:
+                artifact = open(keep_path, 'wb')
+            while True:
+                size = response.raw.readinto(buffer)
+                if not size:
+                    break
+                downloaded += size
+                sha256_hash.update(view[:size])
+                if artifact:
+                    artifact.write(view[:size])
+                if throttle:
+                    throttle(size)
+            run_metrics.record_download(response.url, time.perf_counter() - start, downloaded)
+
+        if artifact:
+            artifact.close()
+        return sha256_hash.hexdigest()
+
+    except Exception as e:
+        print(f"❌ Error calculating hash: {str(e)}")
+        if artifact:
+            artifact.close()
+            try:
+                os.unlink(keep_path)
+            except Exception as e:
+                print(f"Warning: Could not delete partial download: {str(e)}")
+        return None
+
+class HashJob:
+    """A deferred SHA256 calculation for one app record."""
+
+    def __init__(self, display_name, url, record):
+        self.display_name = display_name
+        self.url = url
+        self.record = record
+        self.size = None
+        self.cache_key = None
+        self.sha = None
+        self.done = Future()
+        # Reserve the "sha" key now so it ends up in the same position
+        # as with an inline calculation
+        self.had_sha = "sha" in record
+        record.setdefault("sha", None)
+
+    def apply(self):
+        """Store the calculated hash in the record once the job is done."""
+        self.done.result()
+        if self.sha:
+            self.record["sha"] = self.sha
+        elif not self.had_sha:
+            self.record.pop("sha", None)
+
+class BandwidthLimiter:
+    """Token bucket shared by all hash downloads to cap their combined rate."""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.allowance = bytes_per_second
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, size):
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.last) * self.rate)
+            self.last = now
+            self.allowance -= size
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+class InstallerHashCache:
+    """Persistent SHA256 cache for installer downloads.
+
+    Entries are keyed on the download URL plus the server's validators (ETag,
+    Last-Modified and Content-Length), so a HEAD request is enough to tell
+    whether a hash calculated in an earlier run still applies.
+    """
+
+    max_age_days = 90
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.downloads_avoided = 0
+        self.bytes_saved = 0
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not read hash cache {path}: {str(e)}")
+        cutoff = time.time() - self.max_age_days * 86400
+        self.entries = {key: entry for key, entry in self.entries.items() if entry.get("last_used", 0) >= cutoff}
+
+    @staticmethod
+    def make_key(url, headers):
+        """Build a cache key from HEAD response headers, or None without validators."""
+        etag = headers.get("ETag", "")
+        last_modified = headers.get("Last-Modified", "")
+        if not etag and not last_modified:
             return None
-        finally:
-            # Clean up the temporary file
+        return "\n".join([url, etag, last_modified, headers.get("Content-Length", "")])
+
+    def get(self, key, size=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry["last_used"] = int(time.time())
+            self.downloads_avoided += 1
+            self.bytes_saved += size or entry.get("size") or 0
+            return entry["sha"]
+
+    def put(self, key, sha, size=None):
+        with self.lock:
+            self.entries[key] = {"sha": sha, "size": size, "last_used": int(time.time())}
+            # Save after every new hash so an interrupted run keeps its work
+            self._save()
+
+    def save(self):
+        with self.lock:
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def summary(self):
+        return (f"Installer hash cache: {self.downloads_avoided} downloads avoided, "
+                f"{self.bytes_saved / 1024 / 1024:.1f} MB not re-downloaded")
+
+class RefreshJournal:
+    """Append-only log of the work a refresh has completed, for --resume.
+
+    Every line is one JSON object for a finished stage: the metadata fetched
+    for a list entry, the SHA256 of an installer URL, or the final record of
+    a list entry. List entries are identified by their app list, position and
+    URL, so repeated URLs stay distinct. The journal is removed once the
+    refreshed records have been saved, so it only ever describes an
+    unfinished run.
+
+    The first line records when the run started. A journal without it, or one
+    started more than max_age_hours ago, is discarded instead of resumed, so
+    a stale copy restored from somewhere can't replay outdated results.
+    """
+
+    def __init__(self, path, resume=False, max_age_hours=DEFAULT_JOURNAL_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age = max_age_hours * 3600
+        self.metadata = {}
+        self.hashes = {}
+        self.records = {}
+        self.lock = threading.Lock()
+        resumed = resume and os.path.exists(path) and self._load()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a" if resumed else "w")
+        if not resumed:
+            self._append({"stage": "started", "started_at": time.time()})
+
+    @staticmethod
+    def entry_key(policy, index, url):
+        return f"{policy['label']}:{index}:{url}"
+
+    def _load(self):
+        """Read the journal of an unfinished run; returns False if it is too old to resume."""
+        with open(self.path, "r") as f:
             try:
-                os.unlink(temp_file.name)
+                started_at = json.loads(f.readline()).get("started_at")
+            except ValueError:
+                started_at = None
+            if started_at is None or time.time() - started_at > self.max_age:
+                print(f"⚠️ Not resuming from {self.path}: it is missing its start time or older than "
+                      f"{self.max_age / 3600:g} hours, starting a full run")
+                return False
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line may have been cut off by the interruption
+                    continue
+                if entry["stage"] == "metadata":
+                    self.metadata[entry["key"]] = entry["app_info"]
+                elif entry["stage"] == "hash":
+                    self.hashes[entry["url"]] = entry["sha"]
+                elif entry["stage"] == "persisted":
+                    self.records[entry["key"]] = entry
+        print(f"⏯️ Resuming from {self.path}: {len(self.records)} records, "
+              f"{len(self.hashes)} hashes and {len(self.metadata)} metadata lookups already done")
+        return True
+
+    def _append(self, entry):
+        with self.lock:
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+
+    def fetched(self, key, app_info):
+        self._append({"stage": "metadata", "key": key, "app_info": app_info})
+
+    def hashed(self, url, sha):
+        self._append({"stage": "hash", "url": url, "sha": sha})
+
+    def persisted(self, key, app_key, display_name, record):
+        self._append({"stage": "persisted", "key": key, "app_key": app_key,
+                      "display_name": display_name, "record": record})
+
+    def close(self, completed=False):
+        """Close the journal, deleting it if the run completed."""
+        self.file.close()
+        if completed:
+            os.unlink(self.path)
+
+class HashScheduler:
+    """Hashes jobs on a bounded pool of worker threads, largest download first.
+
+    Jobs can be submitted while earlier ones are still running. Each one is
+    first probed with a HEAD request for its Content-Length, and idle workers
+    always take the largest queued download, so one big installer doesn't end
+    up finishing long after everything else. With a hash cache, the same
+    probe decides whether the download is needed at all. Hashes found in the
+    journal of a resumed run are not calculated again.
+    """
+
+    def __init__(self, workers=1, bandwidth=0, hash_cache=None, journal=None):
+        self.workers = max(1, workers)
+        self.limiter = BandwidthLimiter(bandwidth) if bandwidth else None
+        self.hash_cache = hash_cache
+        self.journal = journal
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._threads = []
+        self._probe_pool = None
+
+    def probe(self, job):
+        try:
+            response = get_transport().head(job.url, allow_redirects=True, timeout=30)
+            if response.ok:
+                length = response.headers.get("Content-Length")
+                job.size = int(length) if length else None
+                job.cache_key = InstallerHashCache.make_key(job.url, response.headers)
+        except Exception as e:
+            print(f"Warning: Could not probe {job.url}: {str(e)}")
+            run_metrics.error("hash_probe")
+        return job
+
+    def submit(self, job):
+        """Queue a job; job.done resolves once job.sha is known."""
+        if self.journal is not None and job.url in self.journal.hashes:
+            job.sha = self.journal.hashes[job.url]
+            print(f"⏯️ Reusing hash for {job.display_name} from the interrupted run")
+            job.done.set_result(job)
+            return job.done
+        if not self._threads:
+            self._start()
+        if self.workers == 1 and self.hash_cache is None:
+            # Order makes no difference to a single worker, so skip the probe
+            self._enqueue(job)
+        else:
+            self._probe_pool.submit(profiler.wrap(self._probe_and_enqueue), job)
+        return job.done
+
+    def close(self):
+        """Wait until every submitted job is done and stop the workers."""
+        if self._probe_pool is not None:
+            self._probe_pool.shutdown(wait=True)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _start(self):
+        self._probe_pool = ThreadPoolExecutor(max_workers=self.workers)
+        for _ in range(self.workers):
+            thread = threading.Thread(target=profiler.wrap(self._worker), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _probe_and_enqueue(self, job):
+        self.probe(job)
+        if self.hash_cache is not None and self._use_cached(job):
+            job.done.set_result(job)
+        else:
+            self._enqueue(job)
+
+    def _enqueue(self, job):
+        # Unknown sizes go first as they may well be the large ones
+        priority = (job.size is not None, -(job.size or 0))
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._sequence), job))
+            self._condition.notify()
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+            try:
+                self._hash(job)
             except Exception as e:
-                print(f"Warning: Could not delete temporary file: {str(e)}")
+                print(f"❌ Error hashing {job.url}: {str(e)}")
+                run_metrics.error("hash")
+            finally:
+                job.done.set_result(job)
+
+    def _hash(self, job):
+        size = f" ({job.size / 1024 / 1024:.1f} MB)" if job.size else ""
+        print(f"🔐 Hashing installer for {job.display_name}{size}")
+        start = time.perf_counter()
+        job.sha = calculate_file_hash(job.url, throttle=self.limiter.consume if self.limiter else None)
+        run_metrics.time_app(job.display_name, "hash", time.perf_counter() - start)
+        if job.sha:
+            print(f"✅ SHA256 hash calculated for {job.display_name}: {job.sha}")
+            run_metrics.count("hashes_computed")
+            if self.journal is not None:
+                self.journal.hashed(job.url, job.sha)
+            if self.hash_cache is not None and job.cache_key:
+                self.hash_cache.put(job.cache_key, job.sha, job.size)
+        else:
+            print(f"⚠️ Could not calculate SHA256 hash for {job.display_name}")
+            run_metrics.error("hash")
+
+    def _use_cached(self, job):
+        if not job.cache_key:
+            return False
+        job.sha = self.hash_cache.get(job.cache_key, job.size)
+        if job.sha:
+            print(f"♻️ Installer for {job.display_name} is unchanged, reusing cached hash")
+        return job.sha is not None
 
 def find_bundle_id(json_string):
     regex_patterns = {
@@ -614,10 +1068,23 @@ def find_bundle_id(json_string):
 
     return None
 
-def get_homebrew_app_info(json_url, needs_packaging=False, is_pkg_in_dmg=False, is_pkg_in_pkg=False, is_pkg=False):
-    response = requests.get(json_url)
+def fetch_cask_data(json_url):
+    """Return the Homebrew API record for a URL, from the cask index when loaded."""
+    if cask_index is not None:
+        data = cask_index.get(token_from_url(json_url))
+        if data is not None:
+            run_metrics.count("cask_index_hits")
+            return data
+        print(f"ℹ️ {json_url} not in cask index, fetching it directly")
+        run_metrics.count("cask_index_misses")
+    if response_cache is not None:
+        return response_cache.get_json(json_url, get_transport())
+    response = get_transport().get(json_url)
     response.raise_for_status()
-    data = response.json()
+    return response.json()
+
+def get_homebrew_app_info(json_url, needs_packaging=False, is_pkg_in_dmg=False, is_pkg_in_pkg=False, is_pkg=False):
+    data = fetch_cask_data(json_url)
     json_string = json.dumps(data)
 
     bundle_id = find_bundle_id(json_string)
@@ -650,55 +1117,300 @@ def get_homebrew_app_info(json_url, needs_packaging=False, is_pkg_in_dmg=False,
     
     return app_info
 
+def merge_repackaged_app(app_info, existing_data):
+    """Update an existing repackaged app record with fresh metadata.
+
+    Returns the updated record and whether the version changed.
+    """
+    # Store the new version and check if it changed
+    new_version = app_info["version"]
+    version_changed = existing_data.get("version") != new_version
+
+    # Always update version and url
+    existing_data["version"] = new_version
+    existing_data["url"] = app_info["url"]
+
+    # For repackaged apps (type "app", "pkg_in_dmg", or "pkg_in_pkg"),
+    # preserve the fileName field from the existing JSON file
+    if "type" in existing_data and existing_data["type"] in ["app", "pkg_in_dmg", "pkg_in_pkg"]:
+        # Keep existing fileName for repackaged apps
+        if "fileName" in existing_data:
+            app_info["fileName"] = existing_data["fileName"]
+    else:
+        # For non-repackaged apps, update fileName to match the URL
+        existing_data["fileName"] = os.path.basename(app_info["url"])
+
+    existing_data["previous_version"] = existing_data.get("version", "")
+    return existing_data, version_changed
+
+def merge_existing_app(app_info, existing_data, display_name, replaced_keys):
+    """Carry every field except replaced_keys over from the existing record."""
+    # Store the new version, url, sha and previous_version
+    new_version = app_info["version"]
+    new_url = app_info["url"]
+    new_sha = app_info.get("sha")
+    previous_version = existing_data.get("version")
+
+    # Preserve all existing data except the replaced keys
+    for key in existing_data:
+        if key not in replaced_keys:
+            app_info[key] = existing_data[key]
+
+    # Update version, url, sha and previous_version
+    app_info["version"] = new_version
+    app_info["url"] = new_url
+
+    # Handle fileName field
+    if display_name.lower().replace(" ", "_") in preserve_filename_apps:
+        # For apps in the exclusion list, preserve the existing fileName
+        print(f"⚠️ Preserving custom fileName for {display_name}")
+    else:
+        # For all other apps, update fileName to match the URL
+        app_info["fileName"] = os.path.basename(new_url)
+    if "sha" in replaced_keys and new_sha:
+        app_info["sha"] = new_sha
+    app_info["previous_version"] = previous_version
+    return app_info
+
+class PipelineItem:
+    """One app on its way through the refresh pipeline."""
+
+    def __init__(self, policy, key, url, display_name, app_key, record, hash_job=None):
+        self.policy = policy
+        self.key = key
+        self.url = url
+        self.display_name = display_name
+        self.app_key = app_key
+        self.record = record
+        self.hash_job = hash_job
+
+class RefreshPipeline:
+    """Streams every URL list through fetch -> merge -> hash -> persist.
+
+    Each stage is a generator feeding the next one, so installers for early
+    apps download while metadata for later apps is still being fetched.
+    Metadata fetches run on the executor's threads and hashing on the
+    HashScheduler's own pool. Merging happens in list order and persisting as
+    hashes finish, both in the calling thread; records of the same app are
+    still applied in order, so the records match a sequential run. Records are
+    read from and stored in the catalog; writing them to disk is up to the
+    caller.
+
+    With a journal every completed stage is recorded, and entries the journal
+    already has results for are not fetched, merged or hashed again.
+    """
+
+    def __init__(self, catalog, policies, executor, hash_scheduler, journal=None):
+        self.catalog = catalog
+        self.policies = policies
+        self.executor = executor
+        self.hash_scheduler = hash_scheduler
+        self.journal = journal
+        self.supported_apps = []
+        self.apps_info = []
+        # Items waiting for a hash, by catalog key, so a repeated entry for
+        # the same app continues from the earlier result
+        self.in_flight = {}
+
+    def run(self):
+        try:
+            for _ in self.persist(self.hash(self.merge(self.fetch()))):
+                pass
+        finally:
+            self.hash_scheduler.close()
+
+    def fetch(self):
+        """Stage 1: request metadata, yielding (policy, key, url, future) in table order."""
+        # Everything is submitted before the first result is consumed
+        fetched = []
+        for policy in self.policies:
+            entries = [(RefreshJournal.entry_key(policy, index, url), url) for index, url in enumerate(policy["urls"])]
+            pending = [url for key, url in entries if self.journaled(key) is None]
+            fetched.append((policy, entries, fetch_app_infos(self.executor, pending, **policy["flags"])))
+        for policy, entries, results in fetched:
+            for key, url in entries:
+                future = self.journaled(key)
+                if future is None:
+                    _, future = next(results)
+                yield policy, key, url, future
+
+    def journaled(self, key):
+        """A resolved future for an entry the journal has metadata or a record for."""
+        if self.journal is None:
+            return None
+        if key in self.journal.records:
+            future = Future()
+            future.set_result(None)
+            return future
+        if key in self.journal.metadata:
+            future = Future()
+            future.set_result(self.journal.metadata[key])
+            return future
+        return None
+
+    def merge(self, fetched):
+        """Stage 2: merge metadata with the existing record and decide on hashing."""
+        for policy, key, url, future in fetched:
+            try:
+                if self.journal is not None and key in self.journal.records:
+                    yield self.resume_one(policy, key, url)
+                else:
+                    yield self.merge_one(policy, key, url, future)
+            except Exception as e:
+                print(f"Error processing {policy['label']} {url}: {str(e)}")
+                run_metrics.error("metadata")
+
+    def hash(self, items):
+        """Stage 3: hand hash jobs to the scheduler, passing items on once hashed."""
+        waiting = []
+        for item in items:
+            finished = [waiting_item for waiting_item in waiting if waiting_item.hash_job.done.done()]
+            for finished_item in finished:
+                waiting.remove(finished_item)
+                yield finished_item
+            if item.hash_job is None:
+                yield item
+            else:
+                self.hash_scheduler.submit(item.hash_job)
+                waiting.append(item)
+        for item in waiting:
+            item.hash_job.done.result()
+            yield item
+
+    def persist(self, items):
+        """Stage 4: store each finished record in the catalog."""
+        for item in items:
+            if self.in_flight.get(item.app_key) is item:
+                del self.in_flight[item.app_key]
+            try:
+                if item.hash_job is not None:
+                    item.hash_job.apply()
+                self.catalog.put(item.app_key, item.record)
+                print(f"Updated app information for {item.display_name}")
+                if self.journal is not None:
+                    self.journal.persisted(item.key, item.app_key, item.display_name, item.record)
+            except Exception as e:
+                print(f"Error processing {item.policy['label']} {item.url}: {str(e)}")
+                run_metrics.error("persist")
+            yield item
+
+    def load_existing(self, app_key):
+        item = self.in_flight.get(app_key)
+        if item is not None:
+            # An earlier entry for this app is still being hashed; continue from its result
+            item.hash_job.apply()
+            return copy.deepcopy(item.record)
+        # Work on a copy so the catalog only changes once the record is complete
+        return copy.deepcopy(self.catalog.get(app_key))
+
+    def resume_one(self, policy, key, url):
+        """Take the finished record of an entry from the journal."""
+        entry = self.journal.records[key]
+        print(f"\n⏯️ Resuming {policy['label']} URL: {url}")
+        self.supported_apps.append(entry["display_name"])
+        self.apps_info.append(entry["record"])
+        return PipelineItem(policy, key, url, entry["display_name"], entry["app_key"], entry["record"])
+
+    def merge_one(self, policy, key, url, future):
+        print(f"\nProcessing {policy['label']} URL: {url}")
+        app_info = future.result()
+        display_name = app_info['name']
+        run_metrics.name_app(url, display_name)
+        if self.journal is not None and key not in self.journal.metadata:
+            self.journal.fetched(key, app_info)
+        self.supported_apps.append(display_name)
+        app_key = sanitize_filename(display_name)
+        existing_data = self.load_existing(app_key)
+        hash_job = None
+
+        if policy["merge"] == "repackaged":
+            record = app_info
+            if existing_data is not None:
+                print(f"Found existing file for {display_name}")
+                record, version_changed = merge_repackaged_app(app_info, existing_data)
+                if version_changed and policy["hash"] == "on_version_change":
+                    print(f"🔍 Version changed, queueing new SHA256 hash for {display_name}...")
+                    hash_job = HashJob(display_name, app_info["url"], record)
+        else:
+            if policy["hash"] == "when_missing":
+                # Only calculate hash if no sha exists or the version has changed
+                if (existing_data is not None and "sha" in existing_data and
+                        existing_data.get("version") == app_info["version"]):
+                    app_info["sha"] = existing_data["sha"]
+                    print(f"ℹ️ Using existing hash for {display_name}")
+                else:
+                    print(f"🔍 Queueing SHA256 hash for {display_name}...")
+                    hash_job = HashJob(display_name, app_info["url"], app_info)
+            record = app_info
+            if existing_data is not None:
+                merge_existing_app(app_info, existing_data, display_name, policy["replaced_keys"])
+
+        item = PipelineItem(policy, key, url, display_name, app_key, record, hash_job)
+        if hash_job is not None:
+            self.in_flight[app_key] = item
+        self.apps_info.append(record)
+        return item
+
 def sanitize_filename(name):
     sanitized = name.replace(' ', '_')
     sanitized = re.sub(r'[^\w_]', '', sanitized)
     return sanitized.lower()
 
-def update_readme_apps(apps_list):
-    readme_path = Path(__file__).parent.parent.parent / "README.md"
-    logos_path = Path(__file__).parent.parent.parent / "Logos"
-    if not readme_path.exists():
-        print("README.md not found")
-        return
+def build_logo_index(logos_path):
+    """Map lower-cased logo file names in logos_path to their actual names."""
+    logo_index = {}
+    if os.path.isdir(logos_path):
+        for file_name in os.listdir(logos_path):
+            logo_index.setdefault(file_name.lower(), file_name)
+    return logo_index
 
+# Badge with the number of supported apps near the top of the README. The
+# indentation is part of the match so it does not grow with every update.
+APPS_BADGE_PATTERN = re.compile(r'[ \t]*<p>\s*<a href="#-supported-applications">\s*<img src="https://img\.shields\.io/badge/Apps_Available-\d+-2ea44f\?style=flat"[^>]*>\s*</a>\s*</p>')
+
+# The timestamp of the latest updates section changes on every run
+LAST_CHECKED_PATTERN = re.compile(r'^\*Last checked: [^*\n]* UTC\*$', re.MULTILINE)
+
+def collect_readme_apps(catalog, logos_path):
+    """Return the name, version and logo of every app in the catalog, sorted by name."""
     print(f"\n📋 Checking logos for all apps...")
     print(f"Looking in: {logos_path}\n")
 
-    # Read all app JSON files to get versions
-    apps_folder = Path(__file__).parent.parent.parent / "Apps"
+    # Scan the Logos folder once for case-insensitive lookups
+    logo_index = build_logo_index(logos_path)
+    used_logos = set()
+
+    # Take versions from every app in the catalog
     apps_info = []
     missing_logos = []
     
-    for app_json in apps_folder.glob("*.json"):
-        # Read the JSON file to get the display name
-        with open(app_json, 'r') as f:
-            try:
-                data = json.load(f)
-                display_name = data['name']
-                # Convert display name to filename format
-                logo_name = sanitize_filename(display_name)
-                
-                # Look for matching logo file (trying both .png and .ico)
-                logo_file = None
-                for ext in ['.png', '.ico']:
-                    # Case-insensitive search for logo files
-                    potential_logos = [f for f in os.listdir(logos_path) 
-                                     if f.lower() == f"{logo_name}{ext}".lower()]
-                    if potential_logos:
-                        logo_file = f"Logos/{potential_logos[0]}"
-                        break
-                
-                if not logo_file:
-                    missing_logos.append(display_name)
-
-                apps_info.append({
-                    'name': display_name,
-                    'version': data['version'],
-                    'logo': logo_file
-                })
-            except Exception as e:
-                print(f"Error reading {app_json}: {e}")
+    for app_key, data in catalog.items():
+        try:
+            display_name = data['name']
+            # Convert display name to filename format
+            logo_name = sanitize_filename(display_name)
+            
+            # Look for matching logo file (trying both .png and .ico)
+            logo_file = None
+            for ext in ['.png', '.ico']:
+                # Case-insensitive lookup of the logo file
+                actual_name = logo_index.get(f"{logo_name}{ext}".lower())
+                if actual_name:
+                    logo_file = f"Logos/{actual_name}"
+                    used_logos.add(actual_name)
+                    break
+            
+            if not logo_file:
+                missing_logos.append(display_name)
+
+            apps_info.append({
+                'name': display_name,
+                'version': data['version'],
+                'logo': logo_file
+            })
+        except Exception as e:
+            print(f"Error reading {catalog.path(app_key)}: {e}")
+            run_metrics.error("readme")
 
     # Print missing logos summary
     if missing_logos:
@@ -713,29 +1425,65 @@ def update_readme_apps(apps_list):
     else:
         print("✅ All apps have logos!\n")
 
+    # Report logos that no app uses anymore
+    orphaned_logos = sorted(set(logo_index.values()) - used_logos, key=str.lower)
+    if orphaned_logos:
+        print(f"🗑️ {len(orphaned_logos)} logos are not used by any app:")
+        for logo in orphaned_logos:
+            print(f"   - Logos/{logo}")
+        print("\n")
+
     # Sort apps by name
     apps_info.sort(key=lambda x: x['name'].lower())
+    return apps_info
+
+def render_apps_table(readme_apps):
+    rows = []
+    for app in readme_apps:
+        logo_cell = f"<img src='{app['logo']}' width='32' height='32'>" if app['logo'] else "❌"
+        rows.append(f"| {logo_cell} {app['name']} | {app['version']} |\n")
 
-    # Create the new table content
-    table_content = """### 📱 Supported Applications
+    return "".join([
+        "### 📱 Supported Applications\n\n",
+        "| Application | Latest Version |\n",
+        "|-------------|----------------|\n",
+        *rows,
+        # Add note about requesting new apps
+        "\n> [!NOTE]\n",
+        "> Missing an app? Feel free to [request additional app support]",
+        "(https://github.com/ugurkocde/IntuneBrew/issues/new?labels=app-request) by creating an issue!\n",
+    ])
 
-| Application | Latest Version |
-|-------------|----------------|
-"""
-    
+def render_latest_updates(apps_info, catalog, checked_at):
+    # Get version changes
+    rows = []
     for app in apps_info:
-        logo_cell = f"<img src='{app['logo']}' width='32' height='32'>" if app['logo'] else "❌"
-        table_content += f"| {logo_cell} {app['name']} | {app['version']} |\n"
+        try:
+            current_data = catalog.get(sanitize_filename(app['name']))
+            if current_data is None:
+                raise KeyError(f"{sanitize_filename(app['name'])} is not in the Apps catalog")
+            if 'previous_version' in current_data and current_data['version'] != current_data['previous_version']:
+                rows.append(f"| {app['name']} | {current_data['previous_version']} | {current_data['version']} |\n")
+        except Exception as e:
+            print(f"Error checking version history for {app['name']}: {e}")
+            run_metrics.error("readme")
 
-    # Add note about requesting new apps
-    table_content += "\n> [!NOTE]\n"
-    table_content += "> Missing an app? Feel free to [request additional app support]"
-    table_content += "(https://github.com/ugurkocde/IntuneBrew/issues/new?labels=app-request) by creating an issue!\n"
+    lines = [
+        "\n## 🔄 Latest Updates\n\n",
+        f"*Last checked: {checked_at} UTC*\n\n",
+    ]
+    if rows:
+        lines.append("| Application | Previous Version | New Version |\n")
+        lines.append("|-------------|-----------------|-------------|\n")
+        lines.extend(rows)
+    else:
+        lines.append("> All applications are up to date! 🎉\n")
+    return "".join(lines)
 
-    # Read the entire README
-    with open(readme_path, 'r') as f:
-        content = f.read()
+def render_apps_badge(total_apps):
+    return f'  <p>\n    <a href="#-supported-applications">\n      <img src="https://img.shields.io/badge/Apps_Available-{total_apps}-2ea44f?style=flat" alt="TotalApps"/>\n    </a>\n  </p>'
 
+def replace_apps_table(content, table_content):
     # Find the supported applications section using the correct marker
     start_marker = "### 📱 Supported Applications"
     end_marker = "## 🔧 Configuration"
@@ -747,380 +1495,190 @@ def update_readme_apps(apps_list):
         print("Couldn't find the markers in README.md")
         print(f"Start marker found: {start_idx != -1}")
         print(f"End marker found: {end_idx != -1}")
-        return
+        return content
 
-    # Construct the new content
-    new_content = (
-        content[:start_idx] +
-        table_content +
-        "\n" +
-        content[end_idx:]
-    )
+    return content[:start_idx] + table_content + "\n" + content[end_idx:]
 
-    # Write the updated content back to README.md
-    with open(readme_path, 'w') as f:
-        f.write(new_content)
-    print("README.md has been updated with the new table format including logos")
+def replace_latest_updates(content, updates_section):
+    # Insert the updates section before the Features section
+    features_section = "## ✨ Features"
+    parts = content.split(features_section, 1)
+    if len(parts) != 2:
+        print("Could not find the Features section in README.md")
+        return content
+
+    # Remove existing updates section if it exists
+    if "## 🔄 Latest Updates" in parts[0]:
+        # Find the start of the updates section
+        updates_start = parts[0].find("## 🔄 Latest Updates")
+        # Keep everything before the updates section, collapsing the blank
+        # lines in between so they don't pile up from one run to the next
+        parts[0] = parts[0][:updates_start].rstrip("\n") + "\n\n"
 
-def update_readme_with_latest_changes(apps_info):
+    return parts[0] + updates_section + features_section + parts[1]
+
+def replace_apps_badge(content, badge):
+    # Replace the existing badge with the new one, or add if not found
+    if APPS_BADGE_PATTERN.search(content):
+        return APPS_BADGE_PATTERN.sub(lambda match: badge, content)
+    # If no badge exists, add after the first paragraph in the centered div
+    return re.sub(r'(  </p>)\n</div>', lambda match: f'{match.group(1)}\n{badge}\n</div>', content)
+
+def readme_digest(content):
+    """Hash of the README ignoring the "Last checked" timestamp."""
+    return hashlib.sha256(LAST_CHECKED_PATTERN.sub("", content).encode("utf-8")).hexdigest()
+
+def update_readme(apps_list, apps_info, catalog):
+    """Render the apps table, latest updates and apps badge into README.md.
+
+    The README is read once and only written if anything besides the
+    "Last checked" timestamp changed.
+    """
     readme_path = Path(__file__).parent.parent.parent / "README.md"
-    
-    # Read current README content
+    logos_path = Path(__file__).parent.parent.parent / "Logos"
+    if not readme_path.exists():
+        print("README.md not found")
+        return
+
+    checked_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M')
+    readme_apps = collect_readme_apps(catalog, logos_path)
+
     with open(readme_path, 'r') as f:
         content = f.read()
 
-    # Prepare the updates section
-    updates_section = "\n## 🔄 Latest Updates\n\n"
-    updates_section += f"*Last checked: {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC*\n\n"
+    new_content = replace_apps_table(content, render_apps_table(readme_apps))
+    new_content = replace_latest_updates(new_content, render_latest_updates(apps_info, catalog, checked_at))
+    new_content = replace_apps_badge(new_content, render_apps_badge(len(catalog)))
 
-    # Get version changes
-    version_changes = []
-    for app in apps_info:
-        try:
-            with open(f"Apps/{sanitize_filename(app['name'])}.json", 'r') as f:
-                current_data = json.load(f)
-                if 'previous_version' in current_data and current_data['version'] != current_data['previous_version']:
-                    version_changes.append({
-                        'name': app['name'],
-                        'old_version': current_data['previous_version'],
-                        'new_version': current_data['version']
-                    })
-        except Exception as e:
-            print(f"Error checking version history for {app['name']}: {e}")
+    if readme_digest(new_content) == readme_digest(content):
+        print(f"README.md is already up to date with {len(readme_apps)} apps, left it untouched")
+        return
 
-    if version_changes:
-        updates_section += "| Application | Previous Version | New Version |\n"
-        updates_section += "|-------------|-----------------|-------------|\n"
-        for change in version_changes:
-            updates_section += f"| {change['name']} | {change['old_version']} | {change['new_version']} |\n"
-    else:
-        updates_section += "> All applications are up to date! 🎉\n"
+    with open(readme_path, 'w') as f:
+        f.write(new_content)
+    run_metrics.count("readme_writes")
+    print(f"Updated README.md with {len(readme_apps)} apps, the latest changes and timestamp: {checked_at} UTC")
 
-    # Find where to insert the updates section (before the Features section)
-    features_section = "## ✨ Features"
-    
-    if features_section in content:
-        parts = content.split(features_section, 1)
-        if len(parts) == 2:
-            # Remove existing updates section if it exists
-            if "## 🔄 Latest Updates" in parts[0]:
-                # Find the start of the updates section
-                updates_start = parts[0].find("## 🔄 Latest Updates")
-                # Find the last newline before the updates section
-                last_newline = parts[0].rfind("\n\n", 0, updates_start)
-                if last_newline != -1:
-                    # Keep everything before the updates section
-                    parts[0] = parts[0][:last_newline] + "\n\n"
-            
-            # Construct new content with updates section in the new location
-            new_content = (
-                parts[0] +
-                updates_section +
-                features_section +
-                parts[1]
-            )
-            
-            # Write the updated content back to README.md
-            with open(readme_path, 'w') as f:
-                f.write(new_content)
-            print(f"Updated README.md with latest changes and timestamp: {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC")
-            return
-    
-    print("Could not find the Features section in README.md")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Collect app information from the Homebrew API and update the Apps folder')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('INTUNEBREW_WORKERS', 1)),
+                        help='Number of concurrent metadata fetches (default: 1, sequential)')
+    parser.add_argument('--cask-index', nargs='?', const=CASK_INDEX_URL, default=os.environ.get('INTUNEBREW_CASK_INDEX'),
+                        metavar='SOURCE',
+                        help=f'Resolve casks from the bulk cask index at SOURCE, a URL or local file (default: {CASK_INDEX_URL})')
+    parser.add_argument('--cache-dir', default=os.environ.get('INTUNEBREW_CACHE_DIR'),
+                        help='Directory for the conditional-request cache of Homebrew API responses')
+    parser.add_argument('--hash-workers', type=int, default=int(os.environ.get('INTUNEBREW_HASH_WORKERS', 1)),
+                        help='Number of installers downloaded and hashed at once (default: 1)')
+    parser.add_argument('--hash-bandwidth', type=float, default=float(os.environ.get('INTUNEBREW_HASH_BANDWIDTH', 0)),
+                        help='Combined download rate cap for hashing in MB/s (default: unlimited)')
+    parser.add_argument('--hash-cache', default=os.environ.get('INTUNEBREW_HASH_CACHE'),
+                        help='File for the persistent installer hash cache (default: installer_hashes.json in --cache-dir)')
+    parser.add_argument('--journal', default=os.environ.get('INTUNEBREW_JOURNAL'),
+                        help='Record completed work in this file (default: refresh_journal.jsonl in --cache-dir)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from its journal instead of starting over')
+    parser.add_argument('--journal-max-age', type=float,
+                        default=float(os.environ.get('INTUNEBREW_JOURNAL_MAX_AGE', DEFAULT_JOURNAL_MAX_AGE_HOURS)),
+                        help=f'Start over instead of resuming journals older than this many hours (default: {DEFAULT_JOURNAL_MAX_AGE_HOURS})')
+    parser.add_argument('--metrics-file', default=os.environ.get('INTUNEBREW_METRICS_FILE'),
+                        help='Write per-phase and per-app timings and counters for this run as JSON')
+    parser.add_argument('--metrics-top', type=int, default=10,
+                        help='Number of slowest apps and hosts listed in the metrics file (default: 10)')
+    parser.add_argument('--profile-dir', default=os.environ.get(PROFILE_DIR_ENV),
+                        help='Profile each phase with cProfile and tracemalloc, writing the results to this directory')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global cask_index, response_cache, run_metrics, profiler
+    args = parse_args(argv)
+    run_metrics = RunMetrics()
+    profiler = Profiler(args.profile_dir, "collect_app_info")
+    workers = max(1, args.workers)
+    get_transport(pool_size=max(10, workers))
+
+    with run_phase("setup"):
+        if args.cask_index:
+            tokens = {token_from_url(url) for policy in app_list_policies for url in policy["urls"]} - {None}
+            cask_index = CaskIndex.load(args.cask_index, tokens=tokens, session=get_transport())
+        if args.cache_dir:
+            response_cache = ResponseCache(args.cache_dir)
 
-def main():
     apps_folder = "Apps"
     os.makedirs(apps_folder, exist_ok=True)
     print(f"\n📁 Apps folder absolute path: {os.path.abspath(apps_folder)}")
     print(f"📁 Apps folder exists: {os.path.exists(apps_folder)}")
     print(f"📁 Apps folder is writable: {os.access(apps_folder, os.W_OK)}\n")
     
-    supported_apps = []
-    apps_info = []
+    hash_cache_path = args.hash_cache or (os.path.join(args.cache_dir, "installer_hashes.json") if args.cache_dir else None)
+    hash_cache = InstallerHashCache(hash_cache_path) if hash_cache_path else None
+    journal_path = args.journal or (os.path.join(args.cache_dir, "refresh_journal.jsonl") if args.cache_dir else None)
+    if args.resume and not journal_path:
+        print("⚠️ --resume needs --journal or --cache-dir, starting a full run")
+    journal = RefreshJournal(journal_path, resume=args.resume, max_age_hours=args.journal_max_age) if journal_path else None
+    hash_scheduler = HashScheduler(args.hash_workers, int(args.hash_bandwidth * 1024 * 1024), hash_cache, journal)
 
-    # Process apps that need special packaging
-    for url in app_urls:
-        try:
-            print(f"\nProcessing special app URL: {url}")
-            app_info = get_homebrew_app_info(url, needs_packaging=True)
-            display_name = app_info['name']
-            print(f"Got app info for: {display_name}")
-            supported_apps.append(display_name)
-            file_name = f"{sanitize_filename(display_name)}.json"
-            print(f"🔍 Sanitized filename: {file_name}")
-            file_path = os.path.join(apps_folder, file_name)
-            print(f"📝 Attempting to write to: {os.path.abspath(file_path)}")
-
-            # For existing files, update version, url, and recalculate SHA if version changed
-            if os.path.exists(file_path):
-                print(f"Found existing file for {display_name}")
-                with open(file_path, "r") as f:
-                    existing_data = json.load(f)
-                    # Store the new version and check if it changed
-                    new_version = app_info["version"]
-                    version_changed = existing_data.get("version") != new_version
-                    
-                    # Always update version and url
-                    existing_data["version"] = new_version
-                    existing_data["url"] = app_info["url"]
-                    
-                    # For repackaged apps (type "app", "pkg_in_dmg", or "pkg_in_pkg"),
-                    # preserve the fileName field from the existing JSON file
-                    if "type" in existing_data and existing_data["type"] in ["app", "pkg_in_dmg", "pkg_in_pkg"]:
-                        # Keep existing fileName for repackaged apps
-                        if "fileName" in existing_data:
-                            app_info["fileName"] = existing_data["fileName"]
-                    else:
-                        # For non-repackaged apps, update fileName to match the URL
-                        existing_data["fileName"] = os.path.basename(app_info["url"])
-                    
-                    existing_data["previous_version"] = existing_data.get("version", "")
-                    
-                    # Calculate new hash if version changed
-                    if version_changed:
-                        print(f"🔍 Version changed, calculating new SHA256 hash for {display_name}...")
-                        file_hash = calculate_file_hash(app_info["url"])
-                        if file_hash:
-                            existing_data["sha"] = file_hash
-                            print(f"✅ New SHA256 hash calculated: {file_hash}")
-                        else:
-                            print(f"⚠️ Could not calculate SHA256 hash for {display_name}")
-                    
-                    # Update app_info with all existing data
-                    app_info = existing_data
-
-            with open(file_path, "w") as f:
-                json.dump(app_info, f, indent=2)
-                print(f"Successfully wrote {file_path} with type 'app' flag")
-
-            apps_info.append(app_info)
-            print(f"Saved app information for {display_name} to {file_path}")
-        except Exception as e:
-            print(f"Error processing special app {url}: {str(e)}")
-            print(f"Full error details: ", e)
+    # Metadata is fetched on `workers` threads and installers are hashed on
+    # `hash_workers` threads; both stages overlap with each other
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    if executor is not None:
+        print(f"⚡ Fetching app metadata with {workers} concurrent workers")
+    with run_phase("load_catalog"):
+        catalog = AppCatalog.load(apps_folder)
+    print(f"📚 Loaded {len(catalog)} app records from {apps_folder}")
+    pipeline = RefreshPipeline(catalog, app_list_policies, executor, hash_scheduler, journal)
+    with run_phase("refresh"):
+        pipeline.run()
+    if executor is not None:
+        executor.shutdown()
+    supported_apps = pipeline.supported_apps
+    apps_info = pipeline.apps_info
 
-    # Process regular Homebrew cask URLs
-    for url in homebrew_cask_urls:
-        try:
-            app_info = get_homebrew_app_info(url)
-            display_name = app_info['name']
-            supported_apps.append(display_name)
-            file_name = f"{sanitize_filename(display_name)}.json"
-            file_path = os.path.join(apps_folder, file_name)
-
-            # Check if we need to calculate hash
-            needs_hash = True
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    existing_data = json.load(f)
-                    # Only calculate hash if:
-                    # 1. No sha exists, or
-                    # 2. Version has changed
-                    if ("sha" in existing_data and
-                        existing_data.get("version") == app_info["version"]):
-                        needs_hash = False
-                        app_info["sha"] = existing_data["sha"]
-                        print(f"ℹ️ Using existing hash for {display_name}")
-
-            if needs_hash:
-                print(f"🔍 Calculating SHA256 hash for {display_name}...")
-                file_hash = calculate_file_hash(app_info["url"])
-                if file_hash:
-                    app_info["sha"] = file_hash
-                    print(f"✅ SHA256 hash calculated: {file_hash}")
-                else:
-                    print(f"⚠️ Could not calculate SHA256 hash for {display_name}")
-
-            # For existing files, preserve existing data and update necessary fields
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    existing_data = json.load(f)
-                    # Store the new version, url, sha and previous_version
-                    new_version = app_info["version"]
-                    new_url = app_info["url"]
-                    new_sha = app_info.get("sha")
-                    previous_version = existing_data.get("version")
-                    
-                    # Preserve all existing data except version, url, sha, and previous_version
-                    for key in existing_data:
-                        if key not in ["version", "url", "sha", "previous_version"]:
-                            app_info[key] = existing_data[key]
-                    
-                    # Update version, url, sha and previous_version
-                    app_info["version"] = new_version
-                    app_info["url"] = new_url
-                    
-                    # Handle fileName field
-                    if display_name.lower().replace(" ", "_") in preserve_filename_apps:
-                        # For apps in the exclusion list, preserve the existing fileName
-                        print(f"⚠️ Preserving custom fileName for {display_name}")
-                    else:
-                        # For all other apps, update fileName to match the URL
-                        app_info["fileName"] = os.path.basename(new_url)
-                    if new_sha:
-                        app_info["sha"] = new_sha
-                    app_info["previous_version"] = previous_version
-
-            with open(file_path, "w") as f:
-                json.dump(app_info, f, indent=2)
-
-            apps_info.append(app_info)
-            print(f"Saved app information for {display_name} to {file_path}")
-        except Exception as e:
-            print(f"Error processing {url}: {str(e)}")
-
-    # Process pkg_in_pkg apps
-    for url in pkg_in_pkg_urls:
-        try:
-            print(f"\nProcessing PKG in PKG app URL: {url}")
-            app_info = get_homebrew_app_info(url, is_pkg_in_pkg=True)
-            display_name = app_info['name']
-            supported_apps.append(display_name)
-            file_name = f"{sanitize_filename(display_name)}.json"
-            file_path = os.path.join(apps_folder, file_name)
-
-            # For existing files, only update version, url and previous_version
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    existing_data = json.load(f)
-                    # Store the new version, url and previous_version
-                    new_version = app_info["version"]
-                    new_url = app_info["url"]
-                    previous_version = existing_data.get("version")
-                    
-                    # Preserve all existing data except version, url and previous_version
-                    for key in existing_data:
-                        if key not in ["version", "url", "previous_version"]:
-                            app_info[key] = existing_data[key]
-                    
-                    # Update version, url and previous_version
-                    app_info["version"] = new_version
-                    app_info["url"] = new_url
-                    
-                    # Handle fileName field
-                    if display_name.lower().replace(" ", "_") in preserve_filename_apps:
-                        # For apps in the exclusion list, preserve the existing fileName
-                        print(f"⚠️ Preserving custom fileName for {display_name}")
-                    else:
-                        # For all other apps, update fileName to match the URL
-                        app_info["fileName"] = os.path.basename(new_url)
-                    # Ensure fileName is preserved
-                    app_info["previous_version"] = previous_version
-
-            with open(file_path, "w") as f:
-                json.dump(app_info, f, indent=2)
-
-            apps_info.append(app_info)
-            print(f"Saved app information for {display_name} to {file_path}")
-        except Exception as e:
-            print(f"Error processing PKG in PKG app {url}: {str(e)}")
-
-    # Process direct pkg apps
-    for url in pkg_urls:
-        try:
-            print(f"\nProcessing direct PKG app URL: {url}")
-            app_info = get_homebrew_app_info(url, is_pkg=True)
-            display_name = app_info['name']
-            supported_apps.append(display_name)
-            file_name = f"{sanitize_filename(display_name)}.json"
-            file_path = os.path.join(apps_folder, file_name)
-
-            # For existing files, only update version, url and previous_version
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    existing_data = json.load(f)
-                    # Store the new version, url and previous_version
-                    new_version = app_info["version"]
-                    new_url = app_info["url"]
-                    previous_version = existing_data.get("version")
-                    
-                    # Preserve all existing data except version, url and previous_version
-                    for key in existing_data:
-                        if key not in ["version", "url", "previous_version"]:
-                            app_info[key] = existing_data[key]
-                    
-                    # Update version, url and previous_version
-                    app_info["version"] = new_version
-                    app_info["url"] = new_url
-                    
-                    # Handle fileName field
-                    if display_name.lower().replace(" ", "_") in preserve_filename_apps:
-                        # For apps in the exclusion list, preserve the existing fileName
-                        print(f"⚠️ Preserving custom fileName for {display_name}")
-                    else:
-                        # For all other apps, update fileName to match the URL
-                        app_info["fileName"] = os.path.basename(new_url)
-                    app_info["previous_version"] = previous_version
-
-            with open(file_path, "w") as f:
-                json.dump(app_info, f, indent=2)
-
-            apps_info.append(app_info)
-            print(f"Saved app information for {display_name} to {file_path}")
-        except Exception as e:
-            print(f"Error processing direct PKG app {url}: {str(e)}")
-
-    # Process pkg_in_dmg apps
-    for url in pkg_in_dmg_urls:
-        try:
-            print(f"\nProcessing PKG in DMG app URL: {url}")
-            app_info = get_homebrew_app_info(url, is_pkg_in_dmg=True)
-            display_name = app_info['name']
-            supported_apps.append(display_name)
-            file_name = f"{sanitize_filename(display_name)}.json"
-            file_path = os.path.join(apps_folder, file_name)
-
-            # For existing files, only update version, url and previous_version
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    existing_data = json.load(f)
-                    # Store the new version, url and previous_version
-                    new_version = app_info["version"]
-                    new_url = app_info["url"]
-                    previous_version = existing_data.get("version")
-                    
-                    # Preserve all existing data except version, url and previous_version
-                    for key in existing_data:
-                        if key not in ["version", "url", "previous_version"]:
-                            app_info[key] = existing_data[key]
-                    
-                    # Update version, url and previous_version
-                    app_info["version"] = new_version
-                    app_info["url"] = new_url
-                    
-                    # Handle fileName field
-                    if display_name.lower().replace(" ", "_") in preserve_filename_apps:
-                        # For apps in the exclusion list, preserve the existing fileName
-                        print(f"⚠️ Preserving custom fileName for {display_name}")
-                    else:
-                        # For all other apps, update fileName to match the URL
-                        app_info["fileName"] = os.path.basename(new_url)
-                    app_info["previous_version"] = previous_version
-
-            with open(file_path, "w") as f:
-                json.dump(app_info, f, indent=2)
-
-            apps_info.append(app_info)
-            print(f"Saved app information for {display_name} to {file_path}")
-        except Exception as e:
-            print(f"Error processing PKG in DMG app {url}: {str(e)}")
+    with run_phase("save_catalog"):
+        write_counts = catalog.save()
+    if journal is not None:
+        # Everything the journal describes is on disk now
+        journal.close(completed=True)
+    for status in ("new", "changed", "unchanged"):
+        run_metrics.count(f"files_{status}", write_counts[status])
+    print(f"\n💾 App files: {write_counts['changed']} changed, {write_counts['unchanged']} unchanged, {write_counts['new']} new")
 
     # Run custom scrapers and update apps_info accordingly
-    for scraper in custom_scrapers:
-        try:
-            subprocess.run([scraper], check=True)
-            # Get the app name from the JSON file created by the scraper
-            json_file = os.path.join(apps_folder, os.path.basename(scraper).replace('.sh', '.json'))
-            if os.path.exists(json_file):
-                with open(json_file, 'r') as f:
-                    app_data = json.load(f)
+    with run_phase("scrapers"):
+        for scraper in custom_scrapers:
+            try:
+                subprocess.run([scraper], check=True)
+                # Pick up the JSON file written by the scraper
+                app_key = os.path.basename(scraper).replace('.sh', '')
+                if os.path.exists(catalog.path(app_key)):
+                    app_data = catalog.reload(app_key)
                     supported_apps.append(app_data['name'])
-        except Exception as e:
-            print(f"Error running scraper {scraper}: {str(e)}")
+            except Exception as e:
+                print(f"Error running scraper {scraper}: {str(e)}")
+                run_metrics.error("scraper")
+
+    # Update the README with the apps table, latest changes and apps badge
+    with run_phase("readme"):
+        update_readme(supported_apps, apps_info, catalog)
+
+    with run_phase("cache_maintenance"):
+        if response_cache is not None:
+            response_cache.evict()
+            run_metrics.count("response_cache_hits", response_cache.hits)
+            run_metrics.count("response_cache_misses", response_cache.misses)
+            print(f"\n📦 {response_cache.summary()}")
+        if hash_cache is not None:
+            hash_cache.save()
+            run_metrics.count("hash_cache_hits", hash_cache.downloads_avoided)
+            print(f"📦 {hash_cache.summary()}")
+        run_metrics.count("http_retries", get_transport().retries)
+        run_metrics.count("circuit_breaker_trips", get_transport().circuit_trips)
+        print(f"🌐 {get_transport().summary()}")
 
-    # Update the README with both the apps table and latest changes
-    update_readme_apps(supported_apps)
-    update_readme_with_latest_changes(apps_info)
+    print(f"\n📊 {run_metrics.summary()}")
+    if args.metrics_file:
+        run_metrics.write(args.metrics_file, args.metrics_top)
+        print(f"📊 Run metrics written to {args.metrics_file}")
 
 if __name__ == "__main__":
     main()
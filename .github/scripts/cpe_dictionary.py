@@ -0,0 +1,147 @@
+"""Offline CPE dictionary index and persisted app -> CPE mappings.
+
+CpeDictionary is loaded from a snapshot of the NVD CPE dictionary in the CPE
+2.0 API format: a JSON document with a "products" array, as in the chunks of
+the nvdcpe-2.0 feed. The snapshot can be one file (optionally gzipped), a
+directory of chunk files or the nvdcpe-2.0.tar.gz archive itself. Application
+CPEs are indexed by vendor and product, so finding the CPE names of an app is
+a dictionary lookup instead of an NVD keywordSearch request.
+
+CpeMappings stores the CPE names resolved for each app in a JSON file, so
+later runs reuse them without any discovery until they are max_age_days old.
+"""
+import gzip
+import io
+import json
+import os
+import tarfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from cve_cache import split_cpe
+from json_stream import iter_array_items
+
+# get_cpe_names uses the same number of most recent CPE names
+RECENT_CPE_COUNT = 5
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+class CpeDictionary:
+    def __init__(self):
+        # (vendor, product) -> [(created, CPE name)]
+        self.by_vendor_product = defaultdict(list)
+        # product -> vendors
+        self.vendors = defaultdict(set)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.by_vendor_product.values())
+
+    def add(self, cpe):
+        """Index one "cpe" object of the dictionary."""
+        cpe_name = cpe.get('cpeName', '')
+        if cpe.get('deprecated') or not cpe_name.startswith('cpe:2.3:a:'):
+            return False
+        parts = split_cpe(cpe_name.lower())
+        if len(parts) != 13:
+            return False
+        vendor, product = parts[3], parts[4]
+        self.by_vendor_product[(vendor, product)].append((cpe.get('created', ''), cpe_name))
+        self.vendors[product].add(vendor)
+        return True
+
+    @classmethod
+    def load(cls, source, products=None):
+        """Stream a dictionary snapshot, keeping only the given (lowercase) products if any."""
+        dictionary = cls()
+        wanted = set(products) if products is not None else None
+        for fp in _open_chunks(source):
+            with fp:
+                for product in iter_array_items(fp, key="products"):
+                    cpe = product.get('cpe', {})
+                    if wanted is not None:
+                        parts = split_cpe(cpe.get('cpeName', '').lower())
+                        if len(parts) < 5 or parts[4] not in wanted:
+                            continue
+                    dictionary.add(cpe)
+        print(f"📚 Loaded {len(dictionary)} CPE names from CPE dictionary {source}")
+        return dictionary
+
+    def cpe_names(self, vendor, product):
+        """CPE names of one vendor and product, newest first."""
+        entries = self.by_vendor_product.get((vendor.lower(), product.lower()), [])
+        return [cpe_name for _, cpe_name in sorted(entries, reverse=True)]
+
+    def lookup(self, app_name, limit=RECENT_CPE_COUNT):
+        """The most recently created CPE names whose product is app_name, like get_cpe_names."""
+        product = app_name.strip().lower()
+        entries = []
+        for vendor in self.vendors.get(product, ()):
+            entries.extend(self.by_vendor_product[(vendor, product)])
+        return [cpe_name for _, cpe_name in sorted(entries, reverse=True)[:limit]]
+
+
+def _open_chunks(source):
+    """Text streams of every JSON document in a file, directory or tar archive."""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(('.json', '.json.gz')):
+                yield _open_file(os.path.join(source, name))
+    elif source.endswith(('.tar.gz', '.tgz', '.tar')):
+        with tarfile.open(source, 'r:*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith('.json'):
+                    yield io.TextIOWrapper(archive.extractfile(member), encoding='utf-8')
+    else:
+        yield _open_file(source)
+
+
+def _open_file(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+class CpeMappings:
+    """App key -> CPE names resolved for the app, kept in a JSON file."""
+
+    def __init__(self, path, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_age = timedelta(days=max_age_days)
+        self.mappings = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.mappings = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable CPE mappings {path}: {e}")
+
+    def get(self, app_key, app_name, today=None):
+        """The stored CPE names of an app, or None if unknown, renamed or too old."""
+        mapping = self.mappings.get(app_key)
+        if not mapping or mapping.get('app_name') != app_name:
+            return None
+        today = today or datetime.now()
+        try:
+            resolved = datetime.strptime(mapping.get('resolved', ''), '%Y-%m-%d')
+        except ValueError:
+            return None
+        if today - resolved > self.max_age:
+            return None
+        return list(mapping.get('cpe_names', []))
+
+    def put(self, app_key, app_name, cpe_names, source, today=None):
+        today = today or datetime.now()
+        self.mappings[app_key] = {
+            'app_name': app_name,
+            'cpe_names': list(cpe_names),
+            'source': source,
+            'resolved': today.strftime('%Y-%m-%d'),
+        }
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.mappings, f, indent=2, sort_keys=True)
+            f.write('\n')
@@ -0,0 +1,207 @@
+"""Local cache of NVD CVE data for the CVE checker.
+
+For every app the cache records the CPE names it was checked against, and for
+every CPE name a compact summary of each CVE NVD reported for it. It also
+remembers when the last successful sync started. An incremental run then asks
+NVD only for the CVEs modified since then (lastModStartDate/lastModEndDate),
+matches their configurations against the cached CPE names locally and merges
+them in, instead of querying every CPE again.
+"""
+import json
+import os
+import re
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# NVD rejects lastModified ranges longer than this
+MAX_SYNC_WINDOW_DAYS = 120
+NVD_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.000"
+
+
+def summarize_cve(cve):
+    """The fields of an NVD cve object the checker uses, as plain JSON."""
+    description = "N/A"
+    for desc in cve.get('descriptions', []):
+        if desc.get('lang') == 'en':
+            description = desc.get('value', 'N/A')
+            break
+
+    base_score = "N/A"
+    severity = "N/A"
+    metrics = cve.get('metrics', {})
+    # Try CVSS 3.1 first, then 3.0, and finally 2.0
+    if metrics.get('cvssMetricV31'):
+        cvss_data = metrics['cvssMetricV31'][0].get('cvssData', {})
+        base_score = cvss_data.get('baseScore', 'N/A')
+        severity = cvss_data.get('baseSeverity', 'N/A')
+    elif metrics.get('cvssMetricV30'):
+        cvss_data = metrics['cvssMetricV30'][0].get('cvssData', {})
+        base_score = cvss_data.get('baseScore', 'N/A')
+        severity = cvss_data.get('baseSeverity', 'N/A')
+    elif metrics.get('cvssMetricV2'):
+        cvss_data = metrics['cvssMetricV2'][0].get('cvssData', {})
+        base_score = cvss_data.get('baseScore', 'N/A')
+        severity = metrics['cvssMetricV2'][0].get('baseSeverity', 'N/A')
+
+    return {
+        "cve_id": cve.get('id', 'N/A'),
+        "published": cve.get('published'),
+        "last_modified": cve.get('lastModified'),
+        "base_score": base_score,
+        "severity": severity,
+        "description": description,
+    }
+
+
+def split_cpe(cpe_name):
+    """Components of a CPE 2.3 name, keeping escaped colons inside a component."""
+    return re.split(r'(?<!\\):', cpe_name)
+
+
+def version_key(version):
+    """Sort key for dotted versions such as 8.10.78 or 2.0-beta1."""
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in re.split(r'[._\-]', version.lower()) if part]
+
+
+def cpe_match_applies(match, cpe_name):
+    """Whether one cpeMatch entry of a CVE configuration covers cpe_name."""
+    criteria = split_cpe(match.get('criteria', '').lower())
+    target = split_cpe(cpe_name.lower())
+    if len(criteria) != 13 or len(target) != 13:
+        return False
+    for index in range(2, 13):
+        if index != 5 and criteria[index] != '*' and criteria[index] != target[index]:
+            return False
+
+    version = target[5]
+    if criteria[5] != '*':
+        return criteria[5] == version
+
+    bounds = [(key, match[key]) for key in ('versionStartIncluding', 'versionStartExcluding',
+                                           'versionEndIncluding', 'versionEndExcluding') if match.get(key)]
+    if not bounds:
+        return True
+    if version in ('*', '-'):
+        return False
+    current = version_key(version)
+    for key, bound in bounds:
+        bound = version_key(bound)
+        if key == 'versionStartIncluding' and current < bound:
+            return False
+        if key == 'versionStartExcluding' and current <= bound:
+            return False
+        if key == 'versionEndIncluding' and current > bound:
+            return False
+        if key == 'versionEndExcluding' and current >= bound:
+            return False
+    return True
+
+
+def vulnerable_matches(cve):
+    """Every cpeMatch entry of a CVE that marks a CPE as vulnerable."""
+    for configuration in cve.get('configurations', []):
+        for node in configuration.get('nodes', []):
+            for match in node.get('cpeMatch', []):
+                if match.get('vulnerable', True):
+                    yield match
+
+
+class CveCache:
+    def __init__(self, path):
+        self.path = path
+        self.last_sync = None
+        # App name -> CPE names it was checked against
+        self.apps = {}
+        # CPE name -> CVE id -> summarize_cve() result
+        self.cpes = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.last_sync = data.get("last_sync")
+                self.apps = data.get("apps", {})
+                self.cpes = data.get("cpes", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable CVE cache {path}: {e}")
+
+    def covers(self, app_name, cpe_names):
+        """Whether the app is cached and was checked against cpe_names.
+
+        Apps without CPE names are never covered, so an incremental run searches
+        NVD for them again instead of keeping an empty result until a full run.
+        """
+        if not cpe_names or app_name not in self.apps:
+            return False
+        return self.apps[app_name] == list(cpe_names)
+
+    def store_app(self, app_name, cves_by_cpe):
+        """Replace what is known about an app with the results of a full query."""
+        self.apps[app_name] = list(cves_by_cpe)
+        for cpe_name, summaries in cves_by_cpe.items():
+            self.cpes[cpe_name] = {summary["cve_id"]: summary for summary in summaries}
+
+    def forget_app(self, app_name):
+        """Drop an app whose results could not be refreshed, so the next run queries it in full."""
+        self.apps.pop(app_name, None)
+
+    def app_cves(self, app_name):
+        """{CPE name: [CVE summaries]} of an app, as a full query would return them."""
+        return {cpe_name: list(self.cpes.get(cpe_name, {}).values()) for cpe_name in self.apps.get(app_name, [])}
+
+    def sync_window(self, now):
+        """(lastModStartDate, lastModEndDate) for an incremental sync, or None if a full one is needed."""
+        if not self.last_sync:
+            return None
+        start = datetime.strptime(self.last_sync, NVD_DATE_FORMAT)
+        if now - start > timedelta(days=MAX_SYNC_WINDOW_DAYS):
+            return None
+        return self.last_sync, now.strftime(NVD_DATE_FORMAT)
+
+    def merge_modified(self, cves):
+        """Merge CVEs modified since the last sync; returns the names of the apps they touched."""
+        # Only CPE names with the vendor and product of a match can be covered by it
+        by_product = defaultdict(list)
+        for cpe_name in self.cpes:
+            by_product[tuple(split_cpe(cpe_name.lower())[3:5])].append(cpe_name)
+
+        touched_cpes = set()
+        for cve in cves:
+            cve_id = cve.get('id')
+            matches = list(vulnerable_matches(cve))
+            rejected = cve.get('vulnStatus') == 'Rejected'
+            candidates = set()
+            for match in matches:
+                vendor_product = tuple(split_cpe(match.get('criteria', '').lower())[3:5])
+                if '*' in vendor_product:
+                    candidates.update(self.cpes)
+                else:
+                    candidates.update(by_product.get(vendor_product, ()))
+            # CPE names that listed this CVE before may have to drop it
+            candidates.update(cpe_name for cpe_name, known in self.cpes.items() if cve_id in known)
+            for cpe_name in candidates:
+                known = self.cpes[cpe_name]
+                applies = not rejected and any(cpe_match_applies(match, cpe_name) for match in matches)
+                if applies:
+                    known[cve_id] = summarize_cve(cve)
+                    touched_cpes.add(cpe_name)
+                elif cve_id in known:
+                    # Withdrawn, or no longer listed for this CPE
+                    del known[cve_id]
+                    touched_cpes.add(cpe_name)
+        return {app_name for app_name, cpe_names in self.apps.items() if touched_cpes.intersection(cpe_names)}
+
+    def save(self, sync_started):
+        """Write the cache, recording sync_started as the start of the next incremental window."""
+        self.last_sync = sync_started.strftime(NVD_DATE_FORMAT)
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"last_sync": self.last_sync, "apps": self.apps, "cpes": self.cpes}, f)
+            os.replace(temp_path, self.path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
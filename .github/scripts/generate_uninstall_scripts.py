@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import hashlib
 import json
 import os
 import requests
@@ -6,19 +7,87 @@ import re
 from pathlib import Path
 import sys
 import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from app_catalog import write_json_if_changed
+from cask_index import CASK_INDEX_URL, CaskIndex
+from http_transport import HttpTransport
+from profiling import PROFILE_DIR_ENV, Profiler
+from response_cache import ResponseCache
 
 # Default output directory
 uninstall_dir = "Uninstall Scripts"
+
+# What to write: per-app "scripts", the "manifest" with the generic uninstaller, or "both"
+output_format = "scripts"
+OUTPUT_FORMATS = ["scripts", "manifest", "both"]
+
+# Bulk cask index, loaded in --cask-index mode
+cask_index = None
+
+# On-disk conditional-request cache, enabled with --cache-dir
+response_cache = None
+
+# Shared HTTP transport with connection pooling, retries and per-host limits
+transport = HttpTransport()
+
+# Connections kept open per host, raised in main() when --jobs needs more
+DEFAULT_POOL_SIZE = 10
+
+# Fingerprints of each app's uninstall data from the last run, kept in the output directory
+FINGERPRINTS_FILE = "uninstall_fingerprints.json"
+
+# Sorted app<TAB>action<TAB>value rows of every app, read by the generic uninstaller
+MANIFEST_FILE = "uninstall_manifest.tsv"
+MANIFEST_HEADER = "# IntuneBrew uninstall manifest: app<TAB>action<TAB>value, sorted by app"
+GENERIC_UNINSTALLER_FILE = "uninstall.sh"
+MANIFEST_URL = "https://raw.githubusercontent.com/ugurkocde/IntuneBrew/main/Uninstall%20Scripts/uninstall_manifest.tsv"
+
+def fetch_json(url):
+    """GET a brew.sh JSON document, through the response cache when enabled"""
+    if response_cache is not None:
+        return response_cache.get_json(url, transport)
+    response = transport.get(url)
+    response.raise_for_status()
+    return response.json()
+
+def lookup_cask_index(app_name, token=None):
+    """Find an app in the loaded cask index, trying the same names as the URL probes"""
+    if token:
+        candidates = [token]
+    else:
+        brew_name = app_name.lower().replace(' ', '-')
+        candidates = [brew_name, brew_name.replace('-', ''), brew_name.replace('-', '_')]
+    for candidate in candidates:
+        app_data = cask_index.get(candidate)
+        if app_data is not None:
+            print(f"Found {app_name} in cask index as {candidate}")
+            return app_data
+    if not token:
+        # Fall back to matching the display names and old tokens of every cask
+        resolved = cask_index.resolve_token(app_name)
+        if resolved:
+            print(f"Resolved {app_name} to cask {resolved} by name")
+            return cask_index.get(resolved)
+    return None
+
 def get_brew_app_info(app_name, token=None):
     """Fetch application information from brew.sh API"""
+    if cask_index is not None:
+        app_data = lookup_cask_index(app_name, token)
+        if app_data is not None:
+            return app_data
+        if not token:
+            # Every URL variant would miss as well, so skip the 404 probes
+            print(f"Could not find {app_name} in cask index")
+            return None
+
     # If token is provided, use it directly
     if token:
         json_url = f"https://formulae.brew.sh/api/cask/{token}.json"
         print(f"Fetching information for {app_name} using token {token} from {json_url}")
         try:
-            response = requests.get(json_url)
-            response.raise_for_status()
-            return response.json()
+            return fetch_json(json_url)
         except requests.exceptions.RequestException as e:
             print(f"Error fetching {json_url}: {str(e)}")
             return None
@@ -29,9 +98,7 @@ def get_brew_app_info(app_name, token=None):
     
     print(f"Fetching information for {app_name} from {json_url}")
     try:
-        response = requests.get(json_url)
-        response.raise_for_status()
-        return response.json()
+        return fetch_json(json_url)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {json_url}: {str(e)}")
         # Try alternative URL formats
@@ -45,9 +112,7 @@ def get_brew_app_info(app_name, token=None):
         for alt_url in alternative_formats:
             try:
                 print(f"Trying alternative URL: {alt_url}")
-                response = requests.get(alt_url)
-                response.raise_for_status()
-                return response.json()
+                return fetch_json(alt_url)
             except requests.exceptions.RequestException:
                 continue
         
@@ -285,6 +350,120 @@ exit 0
 """
     return script_content
 
+# Does what the per-app scripts do, driven by the rows of one app in the manifest
+GENERIC_UNINSTALLER = """#!/bin/bash
+# Generic uninstall script for the apps in the IntuneBrew uninstall manifest
+# Generated by IntuneBrew
+#
+# Usage: uninstall.sh <app> [manifest]
+#   <app>       name of the app as in its uninstall_<app>.sh script, e.g. visual_studio_code
+#   [manifest]  local path or URL of uninstall_manifest.tsv (default: the copy in the IntuneBrew repository)
+
+APP_KEY="$1"
+MANIFEST="${2:-%MANIFEST_URL%}"
+TAB="$(printf '\\t')"
+
+if [ -z "$APP_KEY" ]; then
+  echo "Usage: $0 <app> [manifest]"
+  exit 1
+fi
+
+# Check if running as root
+if [ "$EUID" -ne 0 ]; then
+  echo "Please run as root"
+  exit 1
+fi
+
+if [ ! -f "$MANIFEST" ]; then
+  MANIFEST_COPY="$(mktemp)"
+  trap 'rm -f "$MANIFEST_COPY"' EXIT
+  if ! curl -fsSL "$MANIFEST" -o "$MANIFEST_COPY"; then
+    echo "Could not download the uninstall manifest from $MANIFEST"
+    exit 1
+  fi
+  MANIFEST="$MANIFEST_COPY"
+fi
+
+# The manifest is sorted by app, so look can binary-search it
+if command -v look >/dev/null 2>&1; then
+  ENTRIES="$(LC_ALL=C look "$APP_KEY$TAB" "$MANIFEST")"
+else
+  ENTRIES="$(awk -F '\\t' -v app="$APP_KEY" '$1 == app' "$MANIFEST")"
+fi
+
+if [ -z "$ENTRIES" ]; then
+  echo "No uninstall entries found for $APP_KEY"
+  exit 1
+fi
+
+APP_NAME="$APP_KEY"
+while IFS="$TAB" read -r app action value; do
+  if [ "$action" = "NAME" ]; then
+    APP_NAME="$value"
+  fi
+done <<< "$ENTRIES"
+
+echo "Uninstalling $APP_NAME..."
+
+# Kill application process if running
+echo "Stopping $APP_NAME if running..."
+pkill -f "$APP_NAME" 2>/dev/null || true
+
+while IFS="$TAB" read -r app action value; do
+  case "$action" in
+    PKGUTIL)
+      echo "Removing package $value..."
+      pkgutil --forget "$value" 2>/dev/null || true
+      ;;
+    LAUNCHCTL)
+      echo "Unloading service $value..."
+      launchctl unload -w "/Library/LaunchAgents/$value.plist" 2>/dev/null || true
+      launchctl unload -w "/Library/LaunchDaemons/$value.plist" 2>/dev/null || true
+      launchctl unload -w ~/Library/LaunchAgents/"$value".plist 2>/dev/null || true
+      ;;
+    BUNDLE|SIGNAL)
+      echo "Stopping application $value if running..."
+      killall -9 "$value" 2>/dev/null || true
+      ;;
+    BINARY)
+      echo "Removing binary $value..."
+      if [ -f "$value" ]; then
+        rm -f "$value" 2>/dev/null || true
+      fi
+      ;;
+    PATH)
+      # Expand ~ to $HOME
+      case "$value" in
+        "~"*) value="$HOME${value:1}" ;;
+      esac
+      echo "Removing $value..."
+      if [ -d "$value" ]; then
+        rm -rf "$value" 2>/dev/null || true
+      elif [ -f "$value" ]; then
+        rm -f "$value" 2>/dev/null || true
+      fi
+      ;;
+  esac
+done <<< "$ENTRIES"
+
+echo "Uninstallation complete!"
+exit 0
+""".replace("%MANIFEST_URL%", MANIFEST_URL)
+
+def manifest_rows(app_name, uninstall_paths):
+    """(action, value) rows describing the same steps as generate_uninstall_script"""
+    rows = [("NAME", app_name)]
+    for path in uninstall_paths:
+        action, _, value = path.partition(":")
+        if action in ("PKGUTIL", "LAUNCHCTL", "BUNDLE", "SIGNAL"):
+            rows.append((action, value))
+        elif action == "BINARY":
+            rows.append(("BINARY", value.replace("$APPDIR", f"/Applications/{app_name}.app")))
+        else:
+            rows.append(("PATH", path))
+    # Tabs and newlines would break the row format
+    return [(action, re.sub(r"[\t\r\n]", " ", value)) for action, value in rows]
+
 def sanitize_filename(name):
     """Sanitize the application name for use as a filename"""
     sanitized = name.replace(' ', '_')
@@ -346,7 +525,7 @@ def test_with_json_string(json_string):
 
 
 def main():
-    global uninstall_dir
+    global uninstall_dir, output_format, cask_index, response_cache, transport
     
     parser = argparse.ArgumentParser(description='Generate uninstall scripts for macOS applications using brew.sh data')
     parser.add_argument('--all', action='store_true', help='Generate uninstall scripts for all apps in the Apps directory')
@@ -357,15 +536,50 @@ def main():
     parser.add_argument('--output', type=str, help='Output directory for uninstall scripts', default=uninstall_dir)
     parser.add_argument('--apps-dir', type=str, help='Directory containing app JSON files', default='Apps')
     parser.add_argument('--test-json', action='store_true', help='Test with a JSON string (for development)')
+    parser.add_argument('--cask-index', nargs='?', const=CASK_INDEX_URL, default=os.environ.get('INTUNEBREW_CASK_INDEX'),
+                        metavar='SOURCE', help=f'Resolve casks from the bulk cask index at SOURCE, a URL or local file (default: {CASK_INDEX_URL})')
+    parser.add_argument('--cache-dir', type=str, default=os.environ.get('INTUNEBREW_CACHE_DIR'),
+                        help='Directory for the conditional-request cache of brew.sh API responses')
+    parser.add_argument('--profile-dir', type=str, default=os.environ.get(PROFILE_DIR_ENV),
+                        help='Profile each phase with cProfile and tracemalloc, writing the results to this directory')
+    parser.add_argument('--jobs', type=int, default=int(os.environ.get('INTUNEBREW_JOBS', '1')),
+                        help='Number of apps to fetch and render at the same time with --all or --apps (default: 1)')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='With --all or --apps, only render scripts of apps whose version or uninstall data changed since the last run')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default=os.environ.get('INTUNEBREW_UNINSTALL_FORMAT', output_format),
+                        help=f'Write per-app scripts, the {MANIFEST_FILE} manifest with the generic {GENERIC_UNINSTALLER_FILE}, or both (default: scripts)')
     
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    profiler = Profiler(args.profile_dir, "generate_uninstall_scripts")
     
     # Update output directory if specified
     uninstall_dir = args.output
+    output_format = args.format
+    
+    with profiler.phase("setup"):
+        if args.jobs > DEFAULT_POOL_SIZE:
+            transport = HttpTransport(pool_size=args.jobs)
+        if args.cask_index:
+            cask_index = CaskIndex.load(args.cask_index, session=transport)
+        if args.cache_dir:
+            response_cache = ResponseCache(args.cache_dir)
     
     # Create output directory if it doesn't exist
     os.makedirs(uninstall_dir, exist_ok=True)
     
+    with profiler.phase("generate"):
+        run_selected_mode(args, profiler)
+    
+    with profiler.phase("cache_maintenance"):
+        if response_cache is not None:
+            response_cache.evict()
+            print(response_cache.summary())
+        print(transport.summary())
+
+def run_selected_mode(args, profiler=None):
+    """Generate the scripts requested on the command line"""
     # Process based on arguments
     if args.json_file:
         try:
@@ -425,60 +639,8 @@ def main():
             print(f"Error processing app {args.app}: {str(e)}")
     
     elif args.apps:
-        success_count = 0
-        error_count = 0
-        
-        for app_file_path in args.apps:
-            try:
-                app_file = Path(app_file_path)
-                if not app_file.exists():
-                    print(f"Error: App file not found: {app_file}")
-                    error_count += 1
-                    continue
-                    
-                # Read the local app.json file
-                with open(app_file, 'r') as f:
-                    local_app_data = json.load(f)
-                
-                app_name = local_app_data.get("name")
-                if not app_name:
-                    print(f"Warning: No name found in {app_file}")
-                    error_count += 1
-                    continue
-                    
-                # Handle case where app_name is an array
-                if isinstance(app_name, list):
-                    app_name = app_name[0]
-                
-                # Check if token is available in the local JSON file
-                token = local_app_data.get("token") or local_app_data.get("brew_token")
-                
-                print(f"Processing {app_name} from {app_file}")
-                
-                # Get application data from brew.sh
-                brew_app_data = get_brew_app_info(app_name, token)
-                
-                if not brew_app_data:
-                    print(f"Warning: Could not fetch brew.sh data for {app_name}")
-                    error_count += 1
-                    continue
-                
-                # Extract paths to remove during uninstallation
-                uninstall_paths = extract_uninstall_paths(brew_app_data)
-                
-                if not uninstall_paths:
-                    print(f"Warning: No uninstall paths found for {app_name}")
-                    error_count += 1
-                    continue
-                
-                generate_and_save_script(app_name, uninstall_paths)
-                success_count += 1
-                
-            except Exception as e:
-                print(f"Error processing {app_file_path}: {str(e)}")
-                error_count += 1
-        
-        print(f"Summary: {success_count} scripts generated successfully, {error_count} errors")
+        counts = process_app_files([Path(app_file) for app_file in args.apps], args.jobs, profiler, args.changed_only)
+        print_summary(counts)
             
     elif args.test_json:
         # Test with a JSON string (for development)
@@ -486,30 +648,261 @@ def main():
         test_with_json_string(json_string)
         
     elif args.all:
-        process_all_apps(args.apps_dir)
+        process_all_apps(args.apps_dir, args.jobs, profiler, args.changed_only)
         
     else:
         # Default behavior: process all apps
-        process_all_apps(args.apps_dir)
+        process_all_apps(args.apps_dir, args.jobs, profiler, args.changed_only)
 
 def generate_and_save_script(app_name, uninstall_paths):
     """Generate and save an uninstall script for the given app name and paths"""
-    # Generate uninstall script
-    script_content = generate_uninstall_script(app_name, uninstall_paths)
-    
-    # Save script to file
-    script_filename = f"uninstall_{sanitize_filename(app_name)}.sh"
-    script_path = os.path.join(uninstall_dir, script_filename)
+    if output_format != "manifest":
+        save_script(app_name, generate_uninstall_script(app_name, uninstall_paths))
+    if output_format != "scripts":
+        save_manifest({sanitize_filename(app_name): manifest_rows(app_name, uninstall_paths)})
+
+def write_script(script_path, script_content):
+    """Write an executable script unless the file already holds exactly script_content
+
+    Returns True if the file was written.
+    """
+    if os.path.exists(script_path):
+        with open(script_path, "r", newline="") as f:
+            if f.read() == script_content:
+                return False
     
     with open(script_path, "w", newline="\n") as f:
         f.write(script_content)
     
     # Make script executable
     os.chmod(script_path, 0o755)
+    return True
+
+def save_script(app_name, script_content):
+    """Write a rendered uninstall script to the output directory, unless it already holds exactly that
+
+    Returns True if the file was written.
+    """
+    script_filename = f"uninstall_{sanitize_filename(app_name)}.sh"
+    script_path = os.path.join(uninstall_dir, script_filename)
+    
+    if not write_script(script_path, script_content):
+        print(f"Uninstall script for {app_name} is unchanged: {script_path}")
+        return False
     
     print(f"Created uninstall script for {app_name}: {script_path}")
+    return True
+
+def load_manifest():
+    """Rows of the current manifest grouped by app, in file order"""
+    apps = {}
+    path = os.path.join(uninstall_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return apps
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            key, action, value = line.rstrip("\n").split("\t", 2)
+            apps.setdefault(key, []).append((action, value))
+    return apps
+
+def save_manifest(manifest_apps):
+    """Replace the rows of the given apps in the manifest and write the generic uninstaller next to it"""
+    apps = load_manifest()
+    apps.update(manifest_apps)
+    
+    lines = [MANIFEST_HEADER]
+    # Byte order of "app<TAB>", the order look(1) expects under LC_ALL=C
+    for key in sorted(apps, key=lambda key: (key + "\t").encode("utf-8")):
+        lines.extend(f"{key}\t{action}\t{value}" for action, value in apps[key])
+    
+    path = os.path.join(uninstall_dir, MANIFEST_FILE)
+    if write_json_if_changed(path, "\n".join(lines) + "\n") != "unchanged":
+        print(f"Updated uninstall manifest with {len(manifest_apps)} apps ({len(apps)} in total): {path}")
+    else:
+        print(f"Uninstall manifest is unchanged: {path}")
+    
+    if write_script(os.path.join(uninstall_dir, GENERIC_UNINSTALLER_FILE), GENERIC_UNINSTALLER):
+        print(f"Created generic uninstall script: {os.path.join(uninstall_dir, GENERIC_UNINSTALLER_FILE)}")
+
+def save_token(app_file, token):
+    """Record a resolved cask token in a local app JSON file, so later runs need not guess it"""
+    with open(app_file, 'r') as f:
+        original = f.read()
+    local_app_data = json.loads(original)
+    local_app_data["token"] = token
+    content = json.dumps(local_app_data, indent=2)
+    if original.endswith("\n"):
+        content += "\n"
+    if write_json_if_changed(str(app_file), content, original) != "unchanged":
+        print(f"Saved token {token} to {app_file}")
+
+def uninstall_fingerprint(app_name, uninstall_paths):
+    """Hash of everything an app's uninstall script is rendered from"""
+    data = json.dumps([app_name, uninstall_paths])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def load_fingerprints():
+    path = os.path.join(uninstall_dir, FINGERPRINTS_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable {path}: {str(e)}")
+        return {}
+
+def save_fingerprints(fingerprints):
+    path = os.path.join(uninstall_dir, FINGERPRINTS_FILE)
+    write_json_if_changed(path, json.dumps(fingerprints, indent=2, sort_keys=True) + "\n")
+
+class AppScript:
+    """What render_app_file found out about one app file."""
+
+    def __init__(self, app_file, app_name=None, script_content=None, message=None,
+                 resolved_token=None, fingerprint=None, skipped=False, uninstall_paths=None):
+        self.app_file = app_file
+        self.app_name = app_name
+        self.script_content = script_content
+        self.uninstall_paths = uninstall_paths
+        # Set instead of app_name when no script can be made
+        self.message = message
+        # Cask token found for an app file that has none
+        self.resolved_token = resolved_token
+        self.fingerprint = fingerprint
+        # Nothing changed since the last run, so no script was rendered
+        self.skipped = skipped
+
+def render_app_file(app_file, fingerprints=None):
+    """Read a local app JSON file and render its uninstall script from brew.sh data
+
+    With fingerprints (from load_fingerprints) the script is only rendered when
+    the app's version changed, its uninstall data differs from the last run or
+    its script is missing. Returns an AppScript. Nothing is written here, so it
+    can run on worker threads.
+    """
+    try:
+        if not app_file.exists():
+            return AppScript(app_file, message=f"Error: App file not found: {app_file}")
+        
+        # Read the local app.json file
+        with open(app_file, 'r') as f:
+            local_app_data = json.load(f)
+        
+        app_name = local_app_data.get("name")
+        if not app_name:
+            return AppScript(app_file, message=f"Warning: No name found in {app_file}")
+            
+        # Handle case where app_name is an array
+        if isinstance(app_name, list):
+            app_name = app_name[0]
+        
+        # Check if token is available in the local JSON file
+        token = local_app_data.get("token") or local_app_data.get("brew_token")
+        
+        print(f"Processing {app_name} from {app_file}")
+        
+        # Get application data from brew.sh
+        brew_app_data = get_brew_app_info(app_name, token)
+        
+        if not brew_app_data:
+            return AppScript(app_file, message=f"Warning: Could not fetch brew.sh data for {app_name}")
+        
+        resolved_token = None if token else brew_app_data.get("token")
+        if resolved_token and cask_index is not None and cask_index.is_ambiguous(app_name):
+            # Several casks have this display name, so don't make the guess permanent
+            print(f"Not saving token {resolved_token} for {app_name}: several casks have this name")
+            resolved_token = None
+        
+        # Extract paths to remove during uninstallation
+        uninstall_paths = extract_uninstall_paths(brew_app_data)
+        
+        if not uninstall_paths:
+            return AppScript(app_file, message=f"Warning: No uninstall paths found for {app_name}",
+                             resolved_token=resolved_token)
+        
+        fingerprint = uninstall_fingerprint(app_name, uninstall_paths)
+        if fingerprints is not None:
+            version_changed = local_app_data.get("version") != local_app_data.get("previous_version")
+            script_path = os.path.join(uninstall_dir, f"uninstall_{sanitize_filename(app_name)}.sh")
+            if (not version_changed and fingerprints.get(app_file.stem) == fingerprint
+                    and os.path.exists(script_path)):
+                return AppScript(app_file, app_name, resolved_token=resolved_token,
+                                 fingerprint=fingerprint, skipped=True, uninstall_paths=uninstall_paths)
+        
+        script_content = None
+        if output_format != "manifest":
+            script_content = generate_uninstall_script(app_name, uninstall_paths)
+        return AppScript(app_file, app_name, script_content, resolved_token=resolved_token,
+                         fingerprint=fingerprint, uninstall_paths=uninstall_paths)
+        
+    except json.JSONDecodeError as e:
+        return AppScript(app_file, message=f"Error parsing JSON in {app_file}: {str(e)}")
+    except KeyError as e:
+        return AppScript(app_file, message=f"Missing key in {app_file}: {str(e)}")
+    except Exception as e:
+        return AppScript(app_file, message=f"Error processing {app_file}: {str(e)}")
 
-def process_all_apps(apps_dir_path='Apps'):
+def process_app_files(app_files, jobs=1, profiler=None, changed_only=False):
+    """Render uninstall scripts for app_files, jobs at a time, and save them in input order
+
+    Scripts are written from this thread in the order of app_files, so the
+    output is the same for any number of jobs. Returns a Counter of
+    "regenerated", "unchanged", "skipped", "manifest" and "errors".
+    """
+    counts = Counter()
+    fingerprints = load_fingerprints()
+    manifest_apps = {}
+    previous = fingerprints if changed_only else None
+    
+    render = profiler.wrap(render_app_file) if profiler is not None else render_app_file
+    executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        # Executor.map yields results in input order while later apps are still being fetched
+        args = [previous] * len(app_files)
+        results = executor.map(render, app_files, args) if executor else map(render, app_files, args)
+        for result in results:
+            if result.resolved_token:
+                try:
+                    save_token(result.app_file, result.resolved_token)
+                except (OSError, ValueError) as e:
+                    print(f"Warning: Could not save token to {result.app_file}: {str(e)}")
+            if result.app_name is None:
+                print(result.message)
+                counts["errors"] += 1
+                continue
+            fingerprints[result.app_file.stem] = result.fingerprint
+            manifest_apps[sanitize_filename(result.app_name)] = manifest_rows(result.app_name, result.uninstall_paths)
+            counts["manifest"] += 1
+            if output_format == "manifest":
+                continue
+            if result.skipped:
+                counts["skipped"] += 1
+            elif save_script(result.app_name, result.script_content):
+                counts["regenerated"] += 1
+            else:
+                counts["unchanged"] += 1
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        save_fingerprints(fingerprints)
+    
+    if output_format != "scripts":
+        save_manifest(manifest_apps)
+    
+    return counts
+
+def print_summary(counts):
+    if output_format == "manifest":
+        print(f"Summary: {counts['manifest']} apps added to the manifest successfully, {counts['errors']} errors")
+        return
+    print(f"Summary: {counts['regenerated'] + counts['unchanged']} scripts generated successfully, {counts['errors']} errors")
+    print(f"Scripts: {counts['regenerated']} regenerated, {counts['unchanged']} unchanged, "
+          f"{counts['skipped']} skipped as unchanged since the last run")
+
+def process_all_apps(apps_dir_path='Apps', jobs=1, profiler=None, changed_only=False):
     """Process all apps in the specified directory"""
     apps_dir = Path(apps_dir_path)
     
@@ -517,69 +910,19 @@ def process_all_apps(apps_dir_path='Apps'):
         print(f"Error: Apps directory not found at {apps_dir.absolute()}")
         return
         
-    app_files = list(apps_dir.glob("*.json"))
+    # Sorted, so apps whose names map to the same script always resolve the same way
+    app_files = sorted(apps_dir.glob("*.json"))
     
     if not app_files:
         print(f"Warning: No JSON files found in the Apps directory")
         return
     
-    print(f"Generating uninstall scripts for {len(app_files)} applications...")
+    print(f"Generating uninstall scripts for {len(app_files)} applications with {jobs} job(s)...")
     
-    success_count = 0
-    error_count = 0
-    
-    for app_file in app_files:
-        try:
-            # Read the local app.json file
-            with open(app_file, 'r') as f:
-                local_app_data = json.load(f)
-            
-            app_name = local_app_data.get("name")
-            if not app_name:
-                print(f"Warning: No name found in {app_file}")
-                error_count += 1
-                continue
-                
-            # Handle case where app_name is an array
-            if isinstance(app_name, list):
-                app_name = app_name[0]
-            
-            # Check if token is available in the local JSON file
-            token = local_app_data.get("token") or local_app_data.get("brew_token")
-            
-            print(f"Processing {app_name} from {app_file}")
-            
-            # Get application data from brew.sh
-            brew_app_data = get_brew_app_info(app_name, token)
-            
-            if not brew_app_data:
-                print(f"Warning: Could not fetch brew.sh data for {app_name}")
-                error_count += 1
-                continue
-            
-            # Extract paths to remove during uninstallation
-            uninstall_paths = extract_uninstall_paths(brew_app_data)
-            
-            if not uninstall_paths:
-                print(f"Warning: No uninstall paths found for {app_name}")
-                error_count += 1
-                continue
-            
-            generate_and_save_script(app_name, uninstall_paths)
-            success_count += 1
-            
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON in {app_file}: {str(e)}")
-            error_count += 1
-        except KeyError as e:
-            print(f"Missing key in {app_file}: {str(e)}")
-            error_count += 1
-        except Exception as e:
-            print(f"Error processing {app_file}: {str(e)}")
-            error_count += 1
+    counts = process_app_files(app_files, jobs, profiler, changed_only)
     
     print(f"Uninstall scripts generated in '{uninstall_dir}' directory")
-    print(f"Summary: {success_count} scripts generated successfully, {error_count} errors")
+    print_summary(counts)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
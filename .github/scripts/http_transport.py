@@ -0,0 +1,243 @@
+"""Shared HTTP transport for the catalog scripts.
+
+Wraps one pooled requests session and adds:
+
+- a default timeout on every request
+- retries with exponential backoff and full jitter for connection errors,
+  timeouts and 429/5xx responses, waiting as long as Retry-After asks
+- a cap on concurrent requests per host
+- a circuit breaker per host that fails fast once a host keeps failing, and
+  lets a single trial request through after a cool-down
+- optionally a token bucket shared by all requests, for APIs with a request
+  budget, which slows down further whenever the server asks for it
+
+get(), head() and request() take the same arguments as requests.Session, so
+a transport can be passed anywhere a session is expected. The per-host cap
+covers sending the request and receiving the headers; streamed bodies are read
+outside it.
+"""
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Responses that mean "slow down" rather than "this host is broken"
+THROTTLE_STATUSES = {429}
+DEFAULT_TIMEOUT = (10, 60)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Counts consecutive failures of one host and opens after threshold of them."""
+
+    def __init__(self, threshold=5, cooldown=60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: after the cool-down one request may test the host
+            if not self.trial_running and time.monotonic() - self.opened_at >= self.cooldown:
+                self.trial_running = True
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        """End a half-open trial that neither succeeded nor failed, leaving the circuit as it was."""
+        with self.lock:
+            self.trial_running = False
+
+    def failure(self):
+        """Record a failure; returns True if it opened the circuit."""
+        with self.lock:
+            self.failures += 1
+            was_open = self.opened_at is not None
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+            return not was_open and self.opened_at is not None
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, in bursts of at most burst.
+
+    throttle() pauses every request for a while and halves the rate; each
+    request after that wins back a little of it, until the full rate is reached
+    again.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_budget(cls, requests, period, burst=1):
+        """A bucket that never exceeds requests in any window of period seconds."""
+        return cls((requests - burst) / period, burst)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def throttle(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.rate = max(self.max_rate / 8, self.rate / 2)
+            self.tokens = 0
+
+
+class HttpTransport:
+    def __init__(self, pool_size=10, per_host_limit=None, max_retries=3, backoff=1.0, max_backoff=60,
+                 breaker_threshold=5, breaker_cooldown=60, timeout=DEFAULT_TIMEOUT,
+                 rate_limiter=None, throttle_statuses=THROTTLE_STATUSES):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # More concurrent requests per host than pooled connections would
+        # only open connections that get thrown away afterwards
+        self.per_host_limit = per_host_limit or pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.timeout = timeout
+        # TokenBucket every request waits for, if any
+        self.rate_limiter = rate_limiter
+        self.throttle_statuses = set(throttle_statuses)
+        self.retry_statuses = RETRY_STATUSES | self.throttle_statuses
+        self.retries = 0
+        self.circuit_trips = 0
+        self.throttled = 0
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hooks(self):
+        return self.session.hooks
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault("allow_redirects", False)
+        return self.request("HEAD", url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlparse(url).netloc
+        slots, breaker = self._host(host)
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Not contacting {host}: too many recent failures")
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                with slots:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._failed(host, breaker)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+            except BaseException:
+                # Says nothing about the host, but must not leave a half-open trial running
+                breaker.release_trial()
+                raise
+            else:
+                if response.status_code not in self.retry_statuses:
+                    breaker.success()
+                    return response
+                throttled = response.status_code in self.throttle_statuses
+                if throttled:
+                    breaker.release_trial()
+                else:
+                    self._failed(host, breaker)
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                if throttled:
+                    with self._lock:
+                        self.throttled += 1
+                    if self.rate_limiter is not None:
+                        # Every thread waits, not just the one that was told off
+                        self.rate_limiter.throttle(delay)
+                if attempt >= self.max_retries or delay > self.max_backoff:
+                    return response
+                response.close()
+
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def summary(self):
+        return (f"HTTP transport: {self.retries} retries, {self.circuit_trips} circuit breaker trips, "
+                f"{self.throttled} throttled responses")
+
+    def _host(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (threading.BoundedSemaphore(self.per_host_limit),
+                                     CircuitBreaker(self.breaker_threshold, self.breaker_cooldown))
+            return self._hosts[host]
+
+    def _failed(self, host, breaker):
+        if breaker.failure():
+            with self._lock:
+                self.circuit_trips += 1
+            print(f"⚠️ {host} keeps failing, pausing requests to it for {self.breaker_cooldown}s")
+
+    def _backoff_delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(response):
+        """Seconds to wait according to a Retry-After header, or None."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return int(value)
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,118 @@
+"""Incremental reader for large JSON documents made of one big array.
+
+Used for the Homebrew cask index and NVD data feeds, which are too large to
+load comfortably with json.load. Items are decoded one at a time from a text
+stream, so only the current item and a small read buffer are held in memory.
+"""
+import json
+
+_decoder = json.JSONDecoder()
+_whitespace = " \t\r\n"
+_number_chars = "0123456789.eE+-"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def iter_array_items(fp, key=None, chunk_size=1 << 16):
+    """Yield the items of a JSON array read incrementally from a text stream.
+
+    Without a key the document itself must be an array. With a key the array
+    is taken from that member of the top-level object, e.g. "vulnerabilities"
+    in an NVD feed.
+    """
+    reader = _ChunkReader(fp, chunk_size)
+    if key is None:
+        reader.expect("[")
+    else:
+        reader.seek_member(key)
+        reader.expect(":")
+        reader.expect("[")
+
+    reader.skip_whitespace()
+    if reader.peek() == "]":
+        return
+
+    while True:
+        yield reader.decode_value()
+        reader.skip_whitespace()
+        char = reader.peek()
+        if char == ",":
+            reader.pos += 1
+        elif char == "]":
+            return
+        else:
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+
+
+class _ChunkReader:
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Read another chunk, dropping the already consumed prefix."""
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while self.pos >= len(self.buffer):
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON data")
+        return self.buffer[self.pos]
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def expect(self, char):
+        self.skip_whitespace()
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON data, found {self.peek()!r}")
+        self.pos += 1
+
+    def seek_member(self, key):
+        """Advance to just after the quoted member name of the top-level object."""
+        needle = json.dumps(key)
+        while True:
+            idx = self.buffer.find(needle, self.pos)
+            if idx != -1:
+                self.pos = idx + len(needle)
+                return
+            # Keep a tail long enough to catch a name split across chunks
+            self.pos = max(self.pos, len(self.buffer) - len(needle))
+            if not self._fill():
+                raise ValueError(f"Member {key!r} not found in JSON data")
+
+    def decode_value(self):
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value is probably cut off at the end of the buffer
+                if not self._fill():
+                    raise
+                continue
+            # A bare number cut off by the end of the buffer decodes to a prefix
+            # of itself, e.g. "1." -> 1, so make sure it is followed by more data
+            if not self.eof and (end == len(self.buffer) or
+                                 (_is_number(value) and self.buffer[end] in _number_chars)):
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
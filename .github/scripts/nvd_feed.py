@@ -0,0 +1,129 @@
+"""In-memory CVE index built from locally stored NVD CVE feeds.
+
+The NVD publishes every CVE as yearly JSON feeds plus a "modified" feed
+(nvdcve-2.0-<year>.json.gz, nvdcve-2.0-modified.json.gz). CveFeedIndex streams
+those files with json_stream, keeps the vulnerable cpeMatch criteria of every
+CVE indexed by vendor and product, and answers "which CVEs cover this CPE
+name" without any request to NVD. When a CVE appears in several feeds the
+most recently modified copy wins, so the modified feed can simply be loaded
+along with the yearly ones.
+"""
+import gzip
+import io
+import os
+import zipfile
+from collections import defaultdict
+
+from cve_cache import cpe_match_applies, split_cpe, summarize_cve, vulnerable_matches
+from json_stream import iter_array_items
+
+# Only these fields of a cpeMatch entry matter for matching
+MATCH_FIELDS = ('criteria', 'versionStartIncluding', 'versionStartExcluding',
+                'versionEndIncluding', 'versionEndExcluding')
+
+
+def _vendor_product(criteria):
+    parts = split_cpe(criteria.lower())
+    return (parts[3], parts[4]) if len(parts) == 13 else None
+
+
+class CveFeedIndex:
+    def __init__(self):
+        # CVE id -> summarize_cve() result
+        self.cves = {}
+        # (vendor, product) -> [(cpeMatch entry, CVE id)]
+        self.by_vendor_product = defaultdict(list)
+        # product -> vendors
+        self.vendors = defaultdict(set)
+        # Entries whose vendor or product is a wildcard
+        self.wildcards = []
+
+    @classmethod
+    def load(cls, sources, products=None):
+        """Stream feed files (or directories of them), keeping only the given lowercase products if any."""
+        wanted = set(products) if products is not None else None
+        latest = {}
+        feed_count = 0
+        for fp in _open_feeds(sources):
+            feed_count += 1
+            with fp:
+                for item in iter_array_items(fp, key="vulnerabilities"):
+                    cve = item.get('cve', {})
+                    cve_id = cve.get('id')
+                    last_modified = cve.get('lastModified') or ''
+                    known = latest.get(cve_id)
+                    if known is not None and known[0] > last_modified:
+                        continue
+                    matches = []
+                    # A rejected CVE keeps no matches, which also withdraws older copies of it
+                    if cve.get('vulnStatus') != 'Rejected':
+                        for match in vulnerable_matches(cve):
+                            vendor_product = _vendor_product(match.get('criteria', ''))
+                            if vendor_product is None:
+                                continue
+                            if wanted is None or '*' in vendor_product or vendor_product[1] in wanted:
+                                matches.append({key: match[key] for key in MATCH_FIELDS if match.get(key)})
+                    if matches:
+                        latest[cve_id] = (last_modified, summarize_cve(cve), matches)
+                    elif known is not None:
+                        latest[cve_id] = (last_modified, None, [])
+
+        index = cls()
+        for cve_id, (_, summary, matches) in latest.items():
+            if not matches:
+                continue
+            index.cves[cve_id] = summary
+            for match in matches:
+                vendor_product = _vendor_product(match['criteria'])
+                if '*' in vendor_product:
+                    index.wildcards.append((match, cve_id))
+                else:
+                    index.by_vendor_product[vendor_product].append((match, cve_id))
+                    index.vendors[vendor_product[1]].add(vendor_product[0])
+        print(f"📚 Indexed {len(index.cves)} CVEs from {feed_count} NVD feed files")
+        return index
+
+    def cves_for(self, cpe_name):
+        """Summaries of every CVE with a vulnerable configuration covering cpe_name."""
+        vendor_product = _vendor_product(cpe_name)
+        if vendor_product is None:
+            return []
+        entries = self.by_vendor_product.get(vendor_product, []) + self.wildcards
+        cve_ids = {cve_id for match, cve_id in entries if cpe_match_applies(match, cpe_name)}
+        return [self.cves[cve_id] for cve_id in sorted(cve_ids)]
+
+    def cves_for_product(self, product):
+        """{match criteria: [CVE summaries]} of the product with this name, or None if several vendors have one."""
+        product = product.strip().lower()
+        vendors = self.vendors.get(product, set())
+        if len(vendors) > 1:
+            return None
+        by_criteria = defaultdict(set)
+        for vendor in vendors:
+            for match, cve_id in self.by_vendor_product[(vendor, product)]:
+                by_criteria[match['criteria']].add(cve_id)
+        return {criteria: [self.cves[cve_id] for cve_id in sorted(cve_ids)]
+                for criteria, cve_ids in sorted(by_criteria.items())}
+
+
+def _open_feeds(sources):
+    """Text streams of every feed file in sources (files or directories)."""
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.endswith(('.json', '.json.gz', '.json.zip')):
+                    yield from _open_feed(os.path.join(source, name))
+        else:
+            yield from _open_feed(source)
+
+
+def _open_feed(path):
+    if path.endswith('.gz'):
+        yield gzip.open(path, 'rt', encoding='utf-8')
+    elif path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.endswith('.json'):
+                    yield io.TextIOWrapper(archive.open(name), encoding='utf-8')
+    else:
+        yield open(path, 'r', encoding='utf-8')
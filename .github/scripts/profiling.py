@@ -0,0 +1,116 @@
+"""Opt-in cProfile and tracemalloc hooks for the catalog scripts.
+
+Each phase of a run is wrapped in phase(). When an output directory is set
+(--profile-dir or INTUNEBREW_PROFILE_DIR) every phase writes, prefixed with
+the script name and phase number:
+
+  <name>.prof        raw cProfile stats, for pstats or snakeviz
+  <name>.txt         the top functions by cumulative time, plus memory use
+  <name>.tracemalloc allocation snapshot at the end of the phase
+
+and <script>-summary.json lists wall time and current/peak traced memory per phase.
+Without an output directory phase() does nothing at all.
+
+On Python 3.12 and later cProfile sees every thread. On older versions only
+the calling thread is profiled, so functions run on worker threads should be
+passed through wrap() to have their calls included in the current phase.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_DIR_ENV = "INTUNEBREW_PROFILE_DIR"
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+# Before 3.12 a profiler only sees the thread that enabled it
+_PER_THREAD = sys.version_info < (3, 12)
+
+
+class Profiler:
+    def __init__(self, output_dir=None, script_name="run"):
+        self.output_dir = output_dir
+        self.script_name = script_name
+        self.enabled = bool(output_dir)
+        self.phases = []
+        self._thread_profiles = None
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._thread_profiles = []
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                thread_profiles, self._thread_profiles = self._thread_profiles, None
+            self._dump(name, elapsed, current, peak, [profile] + thread_profiles)
+
+    def wrap(self, func):
+        """Profile func into the current phase when it runs on another thread."""
+        if not self.enabled or not _PER_THREAD:
+            return func
+
+        def run(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    if self._thread_profiles is not None:
+                        self._thread_profiles.append(profile)
+        return run
+
+    def _dump(self, name, elapsed, current, peak, profiles):
+        base = os.path.join(self.output_dir, f"{self.script_name}-{len(self.phases) + 1:02d}-{name}")
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(base + ".prof")
+
+        snapshot = tracemalloc.take_snapshot()
+        snapshot.dump(base + ".tracemalloc")
+
+        report = io.StringIO()
+        report.write(f"Phase {name}: {elapsed:.3f}s, traced memory {current / 1024 / 1024:.1f} MB "
+                     f"(peak {peak / 1024 / 1024:.1f} MB)\n\n")
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        report.write(f"\nTop {TOP_ALLOCATIONS} allocations at the end of the phase:\n")
+        for statistic in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            report.write(f"{statistic}\n")
+        with open(base + ".txt", "w") as f:
+            f.write(report.getvalue())
+
+        self.phases.append({
+            "phase": name,
+            "seconds": round(elapsed, 3),
+            "memory_current_bytes": current,
+            "memory_peak_bytes": peak,
+            "files": os.path.basename(base) + ".*",
+        })
+        with open(os.path.join(self.output_dir, f"{self.script_name}-summary.json"), "w") as f:
+            json.dump(self.phases, f, indent=2)
+        print(f"🔬 Profiled {name}: {elapsed:.1f}s, peak memory {peak / 1024 / 1024:.1f} MB -> {base}.*")
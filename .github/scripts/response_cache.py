@@ -0,0 +1,124 @@
+"""Persistent conditional-request cache for Homebrew API responses.
+
+Each cached response is stored as one JSON file holding the URL, the ETag and
+Last-Modified validators and the parsed body. Later requests send
+If-None-Match / If-Modified-Since, and a 304 reuses the cached body instead of
+downloading it again. Entries that have not been used for max_age_days are
+removed, and the least recently used ones go first when the directory grows
+beyond max_size_mb. The cache directory may hold other files too, so only
+files named like cache entries are ever evicted.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_SIZE_MB = 200
+ENTRY_PREFIX = "response-"
+# Entries written before they had a prefix are evicted as well
+ENTRY_PATTERN = re.compile(r'^(?:response-)?[0-9a-f]{64}\.json$')
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, max_age_days=DEFAULT_MAX_AGE_DAYS, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.max_age = max_age_days * 86400
+        self.max_size = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, url):
+        return os.path.join(self.cache_dir, ENTRY_PREFIX + hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path, entry):
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def get_json(self, url, session):
+        """GET a JSON document, revalidating a cached copy when there is one."""
+        path = self._entry_path(url)
+        entry = self._load(path)
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, headers=headers)
+        if response.status_code == 304 and entry:
+            # Touch the entry so age-based eviction tracks last use
+            os.utime(path)
+            with self._lock:
+                self.hits += 1
+                self.bytes_saved += entry.get("size", 0)
+            return entry["body"]
+
+        response.raise_for_status()
+        body = response.json()
+        with self._lock:
+            self.misses += 1
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._store(path, {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "size": len(response.content),
+                "body": body,
+            })
+        return body
+
+    def evict(self):
+        """Remove expired entries, then the oldest ones until under the size limit."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not ENTRY_PATTERN.match(name):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                os.unlink(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            os.unlink(path)
+            total_size -= size
+
+    def summary(self):
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0
+        return (f"Response cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate), "
+                f"{self.bytes_saved / 1024:.0f} KiB not re-downloaded")
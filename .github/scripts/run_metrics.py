@@ -0,0 +1,114 @@
+"""Timings and counters collected while the catalog scripts run.
+
+Phases are timed with phase(), per-app work with time_app() and HTTP traffic
+per host with record_request() / record_download(). report() turns it all
+into a dict including the slowest apps and hosts, and write() stores that as
+JSON so runs can be compared with each other.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+DEFAULT_TOP_N = 10
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started = time.time()
+        self.phases = {}
+        self.counters = Counter()
+        self.errors = Counter()
+        self._apps = defaultdict(Counter)
+        self._app_names = {}
+        self._hosts = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of the run; repeated phases add up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def error(self, category):
+        with self._lock:
+            self.errors[category] += 1
+
+    def time_app(self, app, stage, seconds):
+        """Add seconds spent on one stage (e.g. "metadata", "hash") of an app."""
+        with self._lock:
+            self._apps[app][stage] += seconds
+
+    def name_app(self, key, name):
+        """Report timings recorded under key (e.g. a URL) under the app's name."""
+        with self._lock:
+            self._app_names[key] = name
+
+    def record_request(self, url, seconds, nbytes=0):
+        """Count one HTTP request; seconds is the time until the response headers."""
+        host = urlparse(url).netloc
+        with self._lock:
+            self.counters["http_requests"] += 1
+            self.counters["bytes_downloaded"] += nbytes
+            self._hosts[host]["requests"] += 1
+            self._hosts[host]["seconds"] += seconds
+            self._hosts[host]["bytes"] += nbytes
+
+    def record_download(self, url, seconds, nbytes):
+        """Add a streamed response body to its request's host."""
+        host = urlparse(url).netloc
+        with self._lock:
+            self.counters["bytes_downloaded"] += nbytes
+            self._hosts[host]["seconds"] += seconds
+            self._hosts[host]["bytes"] += nbytes
+
+    def report(self, top_n=DEFAULT_TOP_N):
+        with self._lock:
+            apps = defaultdict(Counter)
+            for key, stages in self._apps.items():
+                apps[self._app_names.get(key, key)].update(stages)
+            slowest_apps = sorted(apps.items(), key=lambda item: sum(item[1].values()), reverse=True)[:top_n]
+            slowest_hosts = sorted(self._hosts.items(), key=lambda item: item[1]["seconds"], reverse=True)[:top_n]
+            return {
+                "started": datetime.fromtimestamp(self.started, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "wall_seconds": round(time.time() - self.started, 3),
+                "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                "counters": dict(sorted(self.counters.items())),
+                "errors": dict(sorted(self.errors.items())),
+                "slowest_apps": [
+                    {"app": app, "seconds": round(sum(stages.values()), 3),
+                     "stages": {stage: round(seconds, 3) for stage, seconds in sorted(stages.items())}}
+                    for app, stages in slowest_apps
+                ],
+                "slowest_hosts": [
+                    {"host": host, "requests": stats["requests"], "seconds": round(stats["seconds"], 3),
+                     "bytes": stats["bytes"]}
+                    for host, stats in slowest_hosts
+                ],
+            }
+
+    def write(self, path, top_n=DEFAULT_TOP_N):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(top_n), f, indent=2)
+
+    def summary(self):
+        phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.phases.items())
+        errors = sum(self.errors.values())
+        return (f"Phases: {phases or 'none'}; {self.counters['http_requests']} HTTP requests, "
+                f"{self.counters['bytes_downloaded'] / 1024 / 1024:.1f} MB downloaded, {errors} errors")
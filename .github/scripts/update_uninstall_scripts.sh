@@ -23,9 +23,9 @@ python3 -c "import requests" 2>/dev/null || {
 # Get the project root directory (2 levels up from this script)
 PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
 
-# Run the script to generate uninstall scripts
+# Run the script to generate uninstall scripts, passing on options such as --changed-only
 echo "Generating uninstall scripts..."
-python3 "${PROJECT_ROOT}/.github/scripts/generate_uninstall_scripts.py"
+python3 "${PROJECT_ROOT}/.github/scripts/generate_uninstall_scripts.py" "$@"
 
 # Count the number of scripts generated
 script_count=$(find "${PROJECT_ROOT}/Uninstall Scripts" -name "uninstall_*.sh" | wc -l)